@@ -1,52 +1,53 @@
 import streamlit as st
-import pickle
-import pandas as pd
-import requests
 import os
+import yaml
+import requests
 from dotenv import load_dotenv
 
 # Load environment variables (optional for local dev)
 load_dotenv()
 
-# Securely fetch the API key
-TMDB_API_KEY = os.getenv("TMDB_API_KEY")  # Never hardcode secrets in code
 BASE_IMAGE_URL = "https://image.tmdb.org/t/p/w500"
 
-# Load saved artifacts
-movies = pickle.load(open('artifacts/movies.pkl', 'rb'))
-similarity = pickle.load(open('artifacts/similarity.pkl', 'rb'))
+# Number of recommendations shown, shared with the training pipeline
+with open('params.yaml', 'r') as f:
+    TOP_N = yaml.safe_load(f).get('model_trainer', {}).get('top_n_recommendations', 5)
 
-def fetch_poster_path(movie_id):
-    """Fetch poster path from TMDB API given a movie_id."""
-    try:
-        url = f"https://api.themoviedb.org/3/movie/{movie_id}?api_key={TMDB_API_KEY}&language=en-US"
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        return data.get('poster_path', '')
-    except Exception as e:
-        st.warning(f"Could not fetch poster for movie ID {movie_id}: {e}")
-        return ''
-
-def recommend(movie, top_n=5):
-    movie = movie.lower()
-    if movie not in movies['title'].str.lower().values:
-        return []
+with open('config/config.yaml', 'r') as f:
+    CONFIG = yaml.safe_load(f)
+
+# The UI is a thin client of the recommendation service
+# (python src/components/recommendation_service.py), which loads the
+# artifacts once and resolves posters.
+SERVICE_CONFIG = CONFIG.get('service', {})
+SERVICE_URL = os.getenv("RECOMMENDER_URL", SERVICE_CONFIG.get('url', 'http://127.0.0.1:8080')).rstrip('/')
+REQUEST_TIMEOUT = SERVICE_CONFIG.get('request_timeout', 15)
+
+@st.cache_resource(show_spinner=False)
+def get_session():
+    return requests.Session()
+
+session = get_session()
 
-    idx = movies[movies['title'].str.lower() == movie].index[0]
-    distances = similarity[idx]
-    movie_list = sorted(list(enumerate(distances)), reverse=True, key=lambda x: x[1])[1:top_n+1]
+@st.cache_data(show_spinner=False)
+def load_titles():
+    response = session.get(f"{SERVICE_URL}/titles", timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()['titles']
+
+def recommend(movie, top_n=TOP_N):
+    response = session.get(f"{SERVICE_URL}/recommend", params={'title': movie, 'k': top_n}, timeout=REQUEST_TIMEOUT)
+    if response.status_code == 404:
+        return []
+    response.raise_for_status()
 
     recommended = []
-    for i in movie_list:
-        row = movies.iloc[i[0]]
-        title = row['title']
-        movie_id = row.get('movie_id', None)
-        poster_path = ''
-        if movie_id:
-            poster_path = fetch_poster_path(movie_id)
+    for item in response.json()['recommendations']:
+        poster_path = item['poster_path']
+        if poster_path is None:
+            st.warning(f"Could not fetch poster for movie ID {item['movie_id']}")
         poster_url = f"{BASE_IMAGE_URL}{poster_path}" if poster_path else None
-        recommended.append((title, poster_url))
+        recommended.append((item['title'], poster_url))
     return recommended
 
 # Streamlit UI
@@ -63,15 +64,25 @@ st.markdown("""
 
 st.markdown("---")
 
+try:
+    titles = load_titles()
+except requests.RequestException as e:
+    st.error(f"Recommendation service unavailable at {SERVICE_URL}: {e}")
+    st.stop()
+
 # Movie selection
 selected_movie = st.selectbox(
     'Choose a movie to get recommendations:',
-    movies['title'].values
+    titles
 )
 
 # Recommend button
 if st.button('Recommend'):
-    recommendations = recommend(selected_movie)
+    try:
+        recommendations = recommend(selected_movie)
+    except requests.RequestException as e:
+        st.error(f"Recommendation service unavailable at {SERVICE_URL}: {e}")
+        recommendations = None
     if recommendations:
         st.subheader("Top Recommendations:")
         cols = st.columns(len(recommendations))
@@ -82,5 +93,12 @@ if st.button('Recommend'):
                 else:
                     st.text("No poster available")
                 st.caption(title)
-    else:
+    elif recommendations is not None:
         st.warning("Movie not found or not enough data.")
+
+# Service counters (requests, batching, neighbor rows, posters)
+with st.sidebar.expander("Recommendation service"):
+    try:
+        st.json(session.get(f"{SERVICE_URL}/metrics", timeout=REQUEST_TIMEOUT).json())
+    except requests.RequestException as e:
+        st.text(f"Metrics unavailable: {e}")
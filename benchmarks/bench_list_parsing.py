@@ -0,0 +1,84 @@
+# bench_list_parsing.py
+"""
+Compare the JSON and ast.literal_eval backends of parse_list_column.
+
+Runs on data/processed_movies.parquet when it exists, otherwise on a
+synthetic catalog shaped like the TMDB 5000 columns.
+
+    python benchmarks/bench_list_parsing.py [--rows 5000] [--data data/processed_movies.parquet]
+"""
+import os
+import json
+import time
+import argparse
+import random
+import pandas as pd
+
+from src.components.data_io import read_table
+from src.components.feature_engineering import (
+    parse_list_column, extract_names, extract_top_cast, extract_directors,
+)
+
+COLUMNS = {
+    "genres": extract_names,
+    "keywords": extract_names,
+    "cast": extract_top_cast,
+    "crew": extract_directors,
+}
+
+
+def synthetic_catalog(rows, seed=42) -> pd.DataFrame:
+    rng = random.Random(seed)
+    jobs = ["Director", "Producer", "Screenplay", "Editor", "Original Music Composer", "Casting"]
+
+    def people(n, with_job=False):
+        entries = []
+        for i in range(n):
+            entry = {"cast_id": i, "character": f"Role {i}", "credit_id": f"{rng.getrandbits(48):x}",
+                     "gender": rng.randint(0, 2), "id": rng.randint(1, 10 ** 6), "name": f"Person {rng.randint(1, 50000)}"}
+            if with_job:
+                entry.update({"department": "Crew", "job": rng.choice(jobs)})
+            entries.append(entry)
+        return json.dumps(entries)
+
+    return pd.DataFrame({
+        "genres": [json.dumps([{"id": g, "name": f"Genre {g}"} for g in range(rng.randint(1, 4))]) for _ in range(rows)],
+        "keywords": [json.dumps([{"id": k, "name": f"keyword {k}"} for k in range(rng.randint(0, 15))]) for _ in range(rows)],
+        "cast": [people(rng.randint(5, 40)) for _ in range(rows)],
+        "crew": [people(rng.randint(10, 120), with_job=True) for _ in range(rows)],
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data", default="data/processed_movies.parquet")
+    parser.add_argument("--rows", type=int, default=5000, help="Rows of synthetic data when --data is missing")
+    args = parser.parse_args()
+
+    if os.path.exists(args.data):
+        movies = read_table(args.data, columns=list(COLUMNS))
+        source = args.data
+    else:
+        movies = synthetic_catalog(args.rows)
+        source = f"synthetic ({args.rows} rows)"
+    print(f"Data: {source}\n")
+    print(f"{'column':<10}{'literal_eval (s)':>18}{'json (s)':>12}{'speedup':>10}{'identical':>11}")
+
+    totals = {"literal_eval": 0.0, "json": 0.0}
+    for column, extractor in COLUMNS.items():
+        timings, results = {}, {}
+        for backend in ("literal_eval", "json"):
+            started = time.perf_counter()
+            results[backend] = parse_list_column(movies[column], extractor, backend)
+            timings[backend] = time.perf_counter() - started
+            totals[backend] += timings[backend]
+        identical = results["json"].equals(results["literal_eval"])
+        print(f"{column:<10}{timings['literal_eval']:>18.3f}{timings['json']:>12.3f}"
+              f"{timings['literal_eval'] / timings['json']:>9.1f}x{str(identical):>11}")
+
+    print(f"{'total':<10}{totals['literal_eval']:>18.3f}{totals['json']:>12.3f}"
+          f"{totals['literal_eval'] / totals['json']:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
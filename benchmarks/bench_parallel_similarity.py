@@ -0,0 +1,50 @@
+# bench_parallel_similarity.py
+"""
+Compare serial and process-parallel all-pairs top-K neighbor computation.
+
+Times NeighborIndex.all_neighbors for each worker count and checks that
+every parallel result is identical to the serial one. Runs on the
+lemmatized tags of data/processed_data.parquet when it exists, otherwise
+on a synthetic sparse count matrix.
+
+    python benchmarks/bench_parallel_similarity.py [--rows 20000] [--workers 1 2 4] [--backend exact]
+"""
+import os
+import time
+import argparse
+
+import numpy as np
+
+from check_precision import load_vectors
+from src.components.neighbor_index import build_neighbor_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data", default="data/processed_data.parquet")
+    parser.add_argument("--rows", type=int, default=20000, help="Rows of synthetic data when --data is missing")
+    parser.add_argument("--k", type=int, default=50)
+    parser.add_argument("--chunk-size", type=int, default=1024)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count()])
+    parser.add_argument("--backend", default="exact")
+    args = parser.parse_args()
+
+    vectors, source = load_vectors(args.data, args.rows)
+    index = build_neighbor_index(vectors, args.backend)
+    print(f"Data: {source}, backend={args.backend}, K={args.k}, chunk={args.chunk_size}\n")
+    print(f"{'workers':<9}{'time (s)':>10}{'speedup':>9}{'identical':>11}")
+
+    serial, serial_time = None, None
+    for workers in sorted(set(args.workers)):
+        started = time.perf_counter()
+        neighbors = index.all_neighbors(args.k, args.chunk_size, workers=workers)
+        elapsed = time.perf_counter() - started
+        if serial is None:
+            serial, serial_time = neighbors, elapsed
+        identical = (np.array_equal(neighbors.indices, serial.indices)
+                     and np.array_equal(neighbors.scores, serial.scores))
+        print(f"{workers:<9}{elapsed:>10.2f}{serial_time / elapsed:>8.1f}x{str(identical):>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# bench_serving_modes.py
+"""
+Compare the "precomputed" and "lazy" serving modes.
+
+Both artifact bundles are written to a temporary directory and loaded
+fully into memory (no mmap), then queried one title at a time like the app
+does. Reports load time, loaded array size, cold queries (every row a cache
+miss) and warm queries (a small popular set served from the lazy LRU), next
+to the size the legacy dense N x N float64 similarity.pkl would take.
+Runs on the lemmatized tags of data/processed_data.parquet when it exists,
+otherwise on a synthetic sparse count matrix.
+
+    python benchmarks/bench_serving_modes.py [--rows 5000] [--k 50] [--queries 500]
+"""
+import os
+import time
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import CountVectorizer
+
+from check_precision import synthetic_vectors
+from src.components.artifacts import save_serving_artifacts, load_serving_artifacts
+from src.components.data_io import read_table
+from src.components.neighbor_index import ExactIndex
+
+
+def load_catalog(data_path, rows, seed=42):
+    if os.path.exists(data_path):
+        movies = read_table(data_path, columns=["movie_id", "title", "tags"])
+        vectors = CountVectorizer(max_features=5000, stop_words="english").fit_transform(movies["tags"])
+        return movies, vectors, data_path
+    vectors = synthetic_vectors(rows, seed)
+    movies = pd.DataFrame({"movie_id": np.arange(rows), "title": [f"movie {i}" for i in range(rows)]})
+    return movies, vectors, f"synthetic ({rows} rows)"
+
+
+def array_bytes(artifacts) -> int:
+    neighbors = artifacts.neighbors
+    if artifacts.mode == "lazy":
+        vectors = neighbors.index.vectors
+        if sp.issparse(vectors):
+            return vectors.data.nbytes + vectors.indices.nbytes + vectors.indptr.nbytes
+        return vectors.nbytes
+    return neighbors.indices.nbytes + neighbors.scores.nbytes
+
+
+def query_ms(neighbors, rows, top_n):
+    timings = []
+    for row in rows:
+        started = time.perf_counter()
+        neighbors.query([row], top_n)
+        timings.append((time.perf_counter() - started) * 1000)
+    return np.percentile(timings, 50), np.percentile(timings, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data", default="data/processed_data.parquet")
+    parser.add_argument("--rows", type=int, default=5000, help="Rows of synthetic data when --data is missing")
+    parser.add_argument("--k", type=int, default=50)
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    movies, vectors, source = load_catalog(args.data, args.rows)
+    n_items = len(movies)
+    index = ExactIndex(vectors)
+    neighbors = index.all_neighbors(args.k)
+    print(f"Data: {source}, N={n_items}, K={args.k}")
+    print(f"Legacy dense similarity.pkl: {n_items ** 2 * 8 / 2 ** 20:.1f} MiB\n")
+
+    rng = np.random.default_rng(0)
+    cold_rows = rng.choice(n_items, size=min(args.queries, n_items), replace=False)
+    warm_rows = rng.choice(rng.choice(n_items, size=50, replace=False), size=args.queries)
+
+    print(f"{'mode':<13}{'load (ms)':>10}{'arrays (MiB)':>14}{'cold p50/p95 (ms)':>20}{'warm p50/p95 (ms)':>20}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("precomputed", "lazy"):
+            out_dir = os.path.join(tmp, mode)
+            save_serving_artifacts(movies, neighbors, out_dir, mode=mode, vectors=index.vectors)
+
+            started = time.perf_counter()
+            artifacts = load_serving_artifacts(out_dir, mmap=False)
+            load_ms = (time.perf_counter() - started) * 1000
+
+            cold = query_ms(artifacts.neighbors, cold_rows, args.top_n)
+            warm = query_ms(artifacts.neighbors, warm_rows, args.top_n)
+            print(f"{mode:<13}{load_ms:>10.1f}{array_bytes(artifacts) / 2 ** 20:>14.2f}"
+                  f"{cold[0]:>12.3f} / {cold[1]:<6.3f}{warm[0]:>12.3f} / {warm[1]:<6.3f}")
+
+
+if __name__ == "__main__":
+    main()
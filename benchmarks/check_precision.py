@@ -0,0 +1,88 @@
+# check_precision.py
+"""
+Check that top-K neighbor rankings agree across score precisions.
+
+Neighbors are computed in every precision of params.yaml's `precision`
+option, stored, decoded and compared with float64: mean overlap@K of the
+neighbor sets and the largest score error rank by rank. Count vectors have
+many exactly tied scores, so lists can differ by ties at the K-th place
+(and tied neighbors can swap places) without any real ranking change.
+Exits with status 1 when the overlap falls below 1 - tolerance or a score
+error exceeds the precision's rounding step.
+Runs on the lemmatized tags of data/processed_data.parquet when it exists,
+otherwise on a synthetic sparse count matrix.
+
+    python benchmarks/check_precision.py [--k 50] [--tolerance 0.01] [--data data/processed_data.parquet]
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import CountVectorizer
+
+from src.components.data_io import read_table
+from src.components.neighbor_index import ExactIndex
+from src.components.neighbors import PRECISIONS, INT8_SCALE, compute_dtype, encode_scores, decode_scores
+
+# Largest expected |stored - float64| score error per precision
+SCORE_TOLERANCE = {
+    "float64": 1e-12,
+    "float32": 1e-5,
+    "float16": 1e-3,
+    "int8": 0.5 / INT8_SCALE + 1e-6,
+}
+
+
+def synthetic_vectors(rows, seed=42):
+    """Sparse count matrix shaped like the pipeline's CountVectorizer output (5000 terms, ~20 per movie)."""
+    rng = np.random.default_rng(seed)
+    return sp.random(rows, 5000, density=0.004, format="csr", random_state=rng,
+                     data_rvs=lambda n: rng.integers(1, 4, n))
+
+
+def load_vectors(data_path, rows, seed=42):
+    """Count vectors of the lemmatized tags in data_path, or synthetic ones when it is missing."""
+    if os.path.exists(data_path):
+        tags = read_table(data_path, columns=["tags"])["tags"]
+        return CountVectorizer(max_features=5000, stop_words="english").fit_transform(tags), data_path
+    return synthetic_vectors(rows, seed), f"synthetic ({rows} rows)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data", default="data/processed_data.parquet")
+    parser.add_argument("--rows", type=int, default=5000, help="Rows of synthetic data when --data is missing")
+    parser.add_argument("--k", type=int, default=50)
+    parser.add_argument("--tolerance", type=float, default=0.01, help="Allowed loss of mean overlap@K")
+    args = parser.parse_args()
+
+    vectors, source = load_vectors(args.data, args.rows)
+    print(f"Data: {source}, K={args.k}\n")
+
+    reference = ExactIndex(vectors, dtype=np.float64).all_neighbors(args.k)
+    print(f"{'precision':<10}{'time (s)':>10}{'scores (MiB)':>14}{'overlap@K':>11}{'max err':>10}{'ok':>5}")
+
+    failed = False
+    for precision in PRECISIONS:
+        started = time.perf_counter()
+        neighbors = ExactIndex(vectors, dtype=compute_dtype(precision)).all_neighbors(args.k)
+        elapsed = time.perf_counter() - started
+        stored = encode_scores(neighbors.scores, precision)
+        decoded = decode_scores(stored).astype(np.float64)
+
+        overlap = np.mean([len(np.intersect1d(a, b)) for a, b in zip(neighbors.indices, reference.indices)]) / reference.k
+        # Compare scores rank by rank: robust to ties swapping neighbor ids
+        max_error = float(np.abs(decoded - reference.scores).max())
+        ok = overlap >= 1 - args.tolerance and max_error <= SCORE_TOLERANCE[precision]
+        failed |= not ok
+        print(f"{precision:<10}{elapsed:>10.2f}{stored.nbytes / 2 ** 20:>14.2f}{overlap:>11.4f}"
+              f"{max_error:>10.2e}{'yes' if ok else 'NO':>5}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+# artifacts.py
+import os
+import json
+import shutil
+import pickle
+import logging
+import multiprocessing
+import tempfile
+from dataclasses import dataclass
+
+import numpy as np
+import scipy.sparse as sp
+
+from src.components.neighbors import TopKNeighbors, load_neighbors
+from src.components.neighbor_index import ExactIndex, LazyNeighbors
+
+# Setup logging
+log_dir = 'logs'
+os.makedirs(log_dir, exist_ok=True)
+logger = logging.getLogger("artifacts")
+logger.setLevel(logging.DEBUG)
+console_handler = logging.StreamHandler()
+file_mode = 'w' if multiprocessing.current_process().name == 'MainProcess' else 'a'
+file_handler = logging.FileHandler(os.path.join(log_dir, 'artifacts.log'), mode=file_mode)
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+MANIFEST_NAME = "manifest.json"
+FORMAT_VERSION = 1
+SERVING_MODES = ("precomputed", "lazy")
+KEEP_VERSIONS = 2  # Published bundle plus the previous one, for readers still resolving the old link
+POINTER_NAME = "CURRENT"  # Names the published version where symlinks are unavailable
+
+
+@dataclass
+class ServingArtifacts:
+    """
+    Everything the serving layer needs, as plain NumPy arrays.
+
+    Attributes:
+        titles (np.ndarray): Fixed-width unicode array of movie titles, shape (N,).
+        movie_ids (np.ndarray): TMDB movie ids, shape (N,).
+        neighbors (TopKNeighbors or LazyNeighbors): Precomputed top-K neighbor lists, or
+            lists computed on demand from the item vectors ("lazy" serving mode).
+        poster_paths (np.ndarray): Precomputed TMDB poster paths ('' if unresolved), or None.
+        mode (str): Serving mode recorded in the manifest, one of SERVING_MODES.
+    """
+    titles: np.ndarray
+    movie_ids: np.ndarray
+    neighbors: TopKNeighbors
+    poster_paths: np.ndarray = None
+    mode: str = "precomputed"
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+
+def save_serving_artifacts(df, neighbors: TopKNeighbors, out_dir="artifacts/serving", mode="precomputed",
+                           vectors=None):
+    """
+    Write serving arrays as raw .npy files plus a JSON manifest.
+
+    The arrays are plain fixed-width dtypes so load_serving_artifacts can open
+    them with np.load(mmap_mode='r') and share them through the page cache.
+    Neighbor scores keep the precision they were encoded in; the manifest
+    records each array's dtype.
+
+    In "lazy" mode the neighbor lists are not shipped; the L2-normalized item
+    vectors are (CSR as data/indices/indptr arrays), and neighbors are
+    computed at query time.
+
+    Files are never rewritten in place, since processes may have them
+    memory-mapped: each bundle goes to a fresh hidden sibling directory
+    (".serving-*" next to "serving") and `out_dir` is then swapped to a symlink
+    to it with os.replace. Where symlinks are not available (Windows without
+    Developer Mode), `out_dir` is a directory whose CURRENT file names the
+    version, replaced the same way. Running readers keep the old files until
+    they reload; versions older than the previous one are removed.
+
+    Args:
+        df (pd.DataFrame): Catalog with 'title', 'movie_id' and optionally 'poster_path'
+            columns, in neighbor row order.
+        neighbors (TopKNeighbors): Neighbor lists computed for df; in lazy mode only their K is used.
+        out_dir (str): Path of the bundle; becomes a symlink to (or CURRENT pointer at) the new version.
+        mode (str): "precomputed" or "lazy".
+        vectors (np.ndarray or scipy.sparse matrix): L2-normalized item vectors, required in lazy mode;
+            stored in their own dtype.
+    """
+    if mode not in SERVING_MODES:
+        raise ValueError(f"Unknown serving mode '{mode}'. Choose from {SERVING_MODES}.")
+    if mode == "lazy" and vectors is None:
+        raise ValueError("Lazy serving mode needs the normalized item vectors.")
+    out_dir = os.path.normpath(out_dir)
+    parent = os.path.dirname(os.path.abspath(out_dir))
+    os.makedirs(parent, exist_ok=True)
+    version_dir = tempfile.mkdtemp(prefix=f".{os.path.basename(out_dir)}-", dir=parent)
+    try:
+        os.chmod(version_dir, 0o755)
+        arrays = {
+            "titles": df["title"].astype(str).to_numpy(dtype=str),
+            "movie_ids": df["movie_id"].to_numpy(dtype=np.int64),
+        }
+        if mode == "precomputed":
+            arrays["neighbor_indices"] = np.ascontiguousarray(neighbors.indices, dtype=np.int32)
+            arrays["neighbor_scores"] = np.ascontiguousarray(neighbors.scores)
+        elif sp.issparse(vectors):
+            vectors = vectors.tocsr()
+            arrays["vectors_data"] = vectors.data
+            arrays["vectors_indices"] = vectors.indices
+            arrays["vectors_indptr"] = vectors.indptr
+        else:
+            arrays["vectors"] = np.ascontiguousarray(vectors)
+        if "poster_path" in df.columns:
+            arrays["poster_paths"] = df["poster_path"].fillna("").astype(str).to_numpy(dtype=str)
+
+        manifest = {"format_version": FORMAT_VERSION, "mode": mode, "n_items": len(df), "k": neighbors.k, "arrays": {}}
+        if mode == "lazy":
+            manifest["vectors_shape"] = list(vectors.shape)
+        for name, array in arrays.items():
+            file_name = f"{name}.npy"
+            np.save(os.path.join(version_dir, file_name), array)
+            manifest["arrays"][name] = {"file": file_name, "dtype": array.dtype.str, "shape": list(array.shape)}
+        with open(os.path.join(version_dir, MANIFEST_NAME), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        _publish_version(version_dir, out_dir)
+        logger.info(f"Serving artifacts saved to {out_dir} -> {os.path.basename(version_dir)} "
+                    f"(mode={mode}, N={len(df)}, K={neighbors.k}).")
+    except Exception as e:
+        shutil.rmtree(version_dir, ignore_errors=True)
+        logger.error(f"Failed to save serving artifacts: {e}")
+        raise
+    _remove_old_versions(out_dir)
+
+
+def _remove_link(path):
+    # Directory symlinks are removed with rmdir on Windows
+    (os.rmdir if os.name == "nt" else os.remove)(path)
+
+
+def _publish_version(version_dir, out_dir):
+    """
+    Atomically point `out_dir` at `version_dir`.
+
+    `out_dir` becomes a symlink to the version, swapped in with os.replace.
+    If symlinks cannot be created or replaced, it is a plain directory whose
+    CURRENT file names the version instead; that file is swapped the same way.
+    """
+    parent = os.path.dirname(version_dir)
+    name = os.path.basename(out_dir)
+    link = os.path.join(parent, f".{name}.link-{os.getpid()}")
+    try:
+        if os.path.lexists(link):
+            _remove_link(link)
+        os.symlink(os.path.basename(version_dir), link, target_is_directory=True)
+        if os.path.isdir(out_dir) and not os.path.islink(out_dir):
+            # Bundle written in place, checked out by DVC or published through CURRENT: move it aside once
+            aside = tempfile.mkdtemp(prefix=f".{name}-", dir=parent)
+            os.rmdir(aside)
+            os.rename(out_dir, aside)
+        os.replace(link, out_dir)
+        return
+    except OSError as e:
+        if os.path.lexists(link):
+            _remove_link(link)
+        logger.warning(f"Cannot publish {out_dir} as a symlink ({e}); using a {POINTER_NAME} file instead.")
+
+    if os.path.islink(out_dir):
+        _remove_link(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    pointer = os.path.join(out_dir, f".{POINTER_NAME}.tmp-{os.getpid()}")
+    with open(pointer, "w") as f:
+        f.write(os.path.basename(version_dir))
+    os.replace(pointer, os.path.join(out_dir, POINTER_NAME))
+
+
+def _resolve_bundle(out_dir) -> str:
+    """
+    Directory holding the published bundle: the version named by CURRENT, else `out_dir` itself (symlinks resolved).
+    """
+    pointer = os.path.join(out_dir, POINTER_NAME)
+    if os.path.isfile(pointer):
+        with open(pointer, "r") as f:
+            version = f.read().strip()
+        return os.path.realpath(os.path.join(os.path.dirname(os.path.abspath(out_dir)), version))
+    return os.path.realpath(out_dir)
+
+
+def _remove_old_versions(out_dir):
+    parent = os.path.dirname(os.path.abspath(out_dir))
+    prefix = f".{os.path.basename(out_dir)}-"
+    current = _resolve_bundle(out_dir)
+    versions = [
+        os.path.join(parent, entry) for entry in os.listdir(parent)
+        if entry.startswith(prefix) and not os.path.islink(os.path.join(parent, entry))
+    ]
+    versions.sort(key=os.path.getmtime, reverse=True)
+    previous = [path for path in versions if os.path.realpath(path) != current]
+    for path in previous[KEEP_VERSIONS - 1:]:
+        shutil.rmtree(path, ignore_errors=True)
+        logger.info(f"Removed old serving artifacts {path}.")
+
+
+def load_serving_artifacts(out_dir="artifacts/serving", mmap=True,
+                           movies_path="artifacts/movies.pkl",
+                           neighbors_path="artifacts/neighbors.npz",
+                           cache_size=1024) -> ServingArtifacts:
+    """
+    Load serving arrays, memory-mapped when the .npy bundle is available.
+
+    Falls back to movies.pkl + neighbors.npz when no manifest is present.
+    Lazy-mode artifacts come back with LazyNeighbors keeping `cache_size`
+    computed rows. `out_dir` (symlink or CURRENT pointer) is resolved once,
+    so the manifest and arrays always come from the same published version.
+    """
+    out_dir = _resolve_bundle(out_dir)
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        logger.warning(f"No manifest at {manifest_path}; falling back to pickle artifacts.")
+        return _load_pickle_artifacts(movies_path, neighbors_path)
+
+    with open(manifest_path, "r") as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported serving artifact version: {manifest.get('format_version')}")
+
+    mmap_mode = "r" if mmap else None
+    arrays = {
+        name: np.load(os.path.join(out_dir, spec["file"]), mmap_mode=mmap_mode)
+        for name, spec in manifest["arrays"].items()
+    }
+    mode = manifest.get("mode", "precomputed")
+    if mode == "lazy":
+        if "vectors" in arrays:
+            vectors = arrays["vectors"]
+        else:
+            vectors = sp.csr_matrix((arrays["vectors_data"], arrays["vectors_indices"], arrays["vectors_indptr"]),
+                                    shape=tuple(manifest["vectors_shape"]), copy=False)
+        if vectors.dtype == np.float16:
+            # Half precision only shrinks the bundle: NumPy has no fast float16 matmul, so upcast once
+            vectors = vectors.astype(np.float32)
+        index = ExactIndex(vectors, dtype=vectors.dtype, normalized=True)
+        neighbors = LazyNeighbors(index, k=manifest["k"], cache_size=cache_size)
+        logger.info(f"Serving artifacts loaded from {out_dir} (lazy, mmap={mmap}, N={manifest['n_items']}, "
+                    f"vectors {vectors.shape} {vectors.dtype}).")
+    else:
+        neighbors = TopKNeighbors(indices=arrays["neighbor_indices"], scores=arrays["neighbor_scores"])
+        logger.info(f"Serving artifacts loaded from {out_dir} (mmap={mmap}, N={manifest['n_items']}, "
+                    f"scores {neighbors.scores.dtype}).")
+    return ServingArtifacts(
+        titles=arrays["titles"],
+        movie_ids=arrays["movie_ids"],
+        neighbors=neighbors,
+        poster_paths=arrays.get("poster_paths"),
+        mode=mode,
+    )
+
+
+def _load_pickle_artifacts(movies_path, neighbors_path) -> ServingArtifacts:
+    with open(movies_path, "rb") as f:
+        movies = pickle.load(f)
+    return ServingArtifacts(
+        titles=movies["title"].astype(str).to_numpy(dtype=str),
+        movie_ids=movies["movie_id"].to_numpy(dtype=np.int64),
+        neighbors=load_neighbors(neighbors_path),
+        poster_paths=movies["poster_path"].fillna("").astype(str).to_numpy(dtype=str) if "poster_path" in movies else None,
+    )
@@ -0,0 +1,129 @@
+# batch_recommender.py
+import os
+import argparse
+import logging
+import pandas as pd
+import numpy as np
+
+from src.components.artifacts import load_serving_artifacts
+from src.components.recommender import build_title_index, resolve_seed_rows, batch_recommend
+
+# Setup logging
+log_dir = 'logs'
+os.makedirs(log_dir, exist_ok=True)
+logger = logging.getLogger("batch_recommender")
+logger.setLevel(logging.DEBUG)
+console_handler = logging.StreamHandler()
+file_handler = logging.FileHandler(os.path.join(log_dir, 'batch_recommender.log'), mode='w')
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+
+class RecommendationWriter:
+    """
+    Streams recommendation chunks to a CSV or Parquet file, chosen by extension.
+    """
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.parquet = output_path.endswith(".parquet")
+        self._writer = None
+        self._first_chunk = True
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+    def write(self, chunk: pd.DataFrame):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.output_path, table.schema)
+            self._writer.write_table(table)
+        else:
+            chunk.to_csv(self.output_path, mode="w" if self._first_chunk else "a",
+                         header=self._first_chunk, index=False)
+        self._first_chunk = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def recommend_chunk(seeds: pd.Series, artifacts, title_index, top_n, by_index=False) -> pd.DataFrame:
+    """
+    Recommend for one chunk of seeds and return the results in long format.
+
+    Args:
+        seeds (pd.Series): Seed titles, or catalog row indices when by_index is True.
+        artifacts (ServingArtifacts): Loaded serving artifacts.
+        title_index (dict): Normalized title -> row index.
+        top_n (int): Recommendations per seed.
+        by_index (bool): Treat seeds as row indices instead of titles.
+
+    Returns:
+        pd.DataFrame: One row per (seed, rank) with neighbor title, movie id and score.
+    """
+    if by_index:
+        seed_rows = pd.to_numeric(seeds, errors="coerce").fillna(-1).to_numpy(dtype=np.int64)
+        seed_rows[(seed_rows < 0) | (seed_rows >= len(artifacts))] = -1
+    else:
+        seed_rows = resolve_seed_rows(seeds.tolist(), title_index)
+
+    found = seed_rows >= 0
+    if not found.all():
+        logger.warning(f"{(~found).sum()} seeds not found in the catalog were skipped.")
+    seed_rows = seed_rows[found]
+    if len(seed_rows) == 0:
+        return pd.DataFrame()
+
+    indices, scores = batch_recommend(seed_rows, artifacts.neighbors, top_n)
+    n_seeds, n_ranks = indices.shape
+    flat = indices.ravel()
+    return pd.DataFrame({
+        "seed": np.repeat(seeds.to_numpy()[found], n_ranks),
+        "seed_index": np.repeat(seed_rows, n_ranks),
+        "rank": np.tile(np.arange(1, n_ranks + 1), n_seeds),
+        "neighbor_index": flat,
+        "neighbor_title": artifacts.titles[flat],
+        "neighbor_movie_id": artifacts.movie_ids[flat],
+        "score": scores.ravel(),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recommend movies for many seed titles at once.")
+    parser.add_argument("seeds", help="CSV file with one seed per row")
+    parser.add_argument("output", help="Output file (.csv or .parquet)")
+    parser.add_argument("--column", default="title", help="Column of the seeds CSV holding the seeds")
+    parser.add_argument("--by-index", action="store_true", help="Seeds are catalog row indices, not titles")
+    parser.add_argument("--top-n", type=int, default=5, help="Recommendations per seed")
+    parser.add_argument("--chunk-size", type=int, default=100000, help="Seeds processed per chunk")
+    parser.add_argument("--artifacts", default="artifacts/serving", help="Serving artifact directory")
+    args = parser.parse_args()
+
+    try:
+        artifacts = load_serving_artifacts(args.artifacts)
+        title_index = None if args.by_index else build_title_index(artifacts.titles)
+
+        writer = RecommendationWriter(args.output)
+        total = 0
+        for seeds in pd.read_csv(args.seeds, usecols=[args.column], chunksize=args.chunk_size):
+            chunk = recommend_chunk(seeds[args.column], artifacts, title_index, args.top_n, args.by_index)
+            if not chunk.empty:
+                writer.write(chunk)
+            total += len(seeds)
+            logger.info(f"Processed {total} seeds.")
+        writer.close()
+        logger.info(f"Batch recommendations written to {args.output}.")
+
+    except Exception as e:
+        logger.error(f"Batch recommendation failed: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,14 @@
 # data_ingestion.py placeholder
 import os
+import json
 import logging
 import yaml
 import pandas as pd
 import numpy as np
 
+from src.components.feature_engineering import parse_list_column, extract_top_cast, extract_directors
+from src.components.data_io import write_table
+
 # Setup logging
 log_dir = 'logs' 
 os.makedirs(log_dir, exist_ok=True)
@@ -69,12 +73,61 @@ def load_dataset(data_path: str) -> dict:
         logger.error(f"Unexpected error while loading YAML file {data_path}: {e}")
         raise
 
-def preprocess_data(train_df: pd.DataFrame, test_df: pd.DataFrame, save_path: str) -> pd.DataFrame:
+def slim_credits(credits: pd.DataFrame, top_cast: int = 3) -> pd.DataFrame:
     """
-    Preprocess the train and test datasets and save both raw and cleaned datasets.
+    Reduce raw credits rows to the fields feature engineering keeps.
+
+    The cast/crew columns are rewritten as small JSON lists holding only the
+    top cast names and the directors, in the same list-of-dicts shape as the
+    raw TMDB columns, so downstream parsing is unchanged.
+
+    Parameters:
+        credits (pd.DataFrame): Raw credits rows ('movie_id', 'title', 'cast', 'crew').
+        top_cast (int): Number of cast members to keep.
+
+    Returns:
+        pd.DataFrame: Slim credits with the same columns.
+    """
+    cast = parse_list_column(credits['cast'], lambda items: extract_top_cast(items, top_cast))
+    crew = parse_list_column(credits['crew'], extract_directors)
+    return pd.DataFrame({
+        'movie_id': credits['movie_id'].to_numpy(),
+        'title': credits['title'].to_numpy(),
+        'cast': [json.dumps([{'name': name} for name in names]) for names in cast],
+        'crew': [json.dumps([{'name': name, 'job': 'Director'} for name in names]) for names in crew],
+    })
+
+
+def load_credits_streaming(credits_path: str, chunksize: int = 500, top_cast: int = 3) -> pd.DataFrame:
+    """
+    Read the credits CSV in chunks and slim each chunk as it is read.
+
+    Only one chunk of raw cast/crew JSON is held in memory at a time, so peak
+    memory no longer scales with the size of the raw crew payload.
 
     Parameters:
-        train (pd.DataFrame): The movies DataFrame.
+        credits_path (str): Path to tmdb_5000_credits.csv.
+        chunksize (int): Rows read per chunk.
+        top_cast (int): Number of cast members to keep.
+
+    Returns:
+        pd.DataFrame: Slim credits for the whole file.
+    """
+    chunks = []
+    for chunk in pd.read_csv(credits_path, chunksize=chunksize):
+        chunks.append(slim_credits(chunk, top_cast))
+        logger.debug("Slimmed credits chunk of %d rows", len(chunk))
+    credits = pd.concat(chunks, ignore_index=True)
+    logger.info("Streamed %d credits rows in chunks of %d", len(credits), chunksize)
+    return credits
+
+
+def preprocess_data(movies: pd.DataFrame, credits: pd.DataFrame, save_path: str) -> pd.DataFrame:
+    """
+    Merge and clean the movies and credits datasets.
+
+    Parameters:
+        movies (pd.DataFrame): The movies DataFrame.
         credits (pd.DataFrame): The credits DataFrame.
         save_path (str): Folder path to save raw and processed data.
 
@@ -109,22 +162,28 @@ def main():
     save_path = "data"  # saving the processed_data in data folder
     os.makedirs(save_path, exist_ok=True)
 
+    ingestion_config = config.get("data_ingestion", {})
+
     # Load datasets using config values
     try:
         movies = pd.read_csv(config["paths"]['movies_path'])
-        credits = pd.read_csv(config["paths"]['credits_path'])
+        if ingestion_config.get("streaming", True):
+            credits = load_credits_streaming(
+                config["paths"]['credits_path'],
+                chunksize=ingestion_config.get("credits_chunksize", 500),
+                top_cast=ingestion_config.get("top_cast", 3),
+            )
+        else:
+            credits = pd.read_csv(config["paths"]['credits_path'])
 
         print("movies dataset loaded successfully with shape:", movies.shape)
         print("credits dataset loaded successfully with shape:", credits.shape)
-        
-        # Save processed data
-        movies.to_csv(os.path.join(save_path, "processed_movies.csv"), index=False)
-        logger.info("Processed data saved successfully.")
 
         # Preprocess and save the cleaned data
         processed = preprocess_data(movies, credits,save_path)
-        processed.to_csv(os.path.join(save_path, "processed_movies.csv"), index=False)
-        logger.info("Processed data saved successfully to %s.", save_path)
+        processed_path = config["paths"].get("processed_data", os.path.join(save_path, "processed_movies.parquet"))
+        write_table(processed, processed_path, export_csv=config["paths"].get("export_csv", False))
+        logger.info("Processed data saved successfully to %s.", processed_path)
         logger.info("Preprocessing complete. Final shape: %s", processed.shape)
         
     except KeyError as e:
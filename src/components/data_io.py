@@ -0,0 +1,64 @@
+# data_io.py
+import os
+import logging
+import multiprocessing
+import pandas as pd
+
+# Setup logging
+log_dir = 'logs'
+os.makedirs(log_dir, exist_ok=True)
+logger = logging.getLogger("data_io")
+logger.setLevel(logging.DEBUG)
+console_handler = logging.StreamHandler()
+file_mode = 'w' if multiprocessing.current_process().name == 'MainProcess' else 'a'
+file_handler = logging.FileHandler(os.path.join(log_dir, 'data_io.log'), mode=file_mode)
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+
+def read_table(path: str, columns=None) -> pd.DataFrame:
+    """
+    Read a pipeline intermediate, Parquet or CSV by file extension.
+
+    Args:
+        path (str): File to read.
+        columns (list): Optional column projection; with Parquet only these
+            columns are read from disk.
+
+    Returns:
+        pd.DataFrame: The requested columns.
+    """
+    try:
+        if path.endswith(".parquet"):
+            df = pd.read_parquet(path, columns=columns)
+        else:
+            df = pd.read_csv(path, usecols=columns)
+        logger.debug("Read %s with shape %s", path, df.shape)
+        return df
+    except FileNotFoundError:
+        logger.error(f"Intermediate file not found: {path}")
+        raise
+
+
+def write_table(df: pd.DataFrame, path: str, export_csv: bool = False):
+    """
+    Write a pipeline intermediate, Parquet or CSV by file extension.
+
+    Args:
+        df (pd.DataFrame): Data to write.
+        path (str): Destination file.
+        export_csv (bool): Also write a CSV copy next to a Parquet file.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if path.endswith(".parquet"):
+        df.to_parquet(path, index=False)
+        if export_csv:
+            csv_path = os.path.splitext(path)[0] + ".csv"
+            df.to_csv(csv_path, index=False)
+            logger.debug("Exported CSV copy to %s", csv_path)
+    else:
+        df.to_csv(path, index=False)
+    logger.debug("Wrote %s with shape %s", path, df.shape)
@@ -1,12 +1,22 @@
 # feature_engineering.py
 import pandas as pd 
 import ast
+import json
 import os 
 import logging 
 import yaml 
 import pickle 
 import numpy as np
 
+from src.components.data_io import read_table, write_table
+from src.components.row_cache import RowCache
+
+try:
+    import orjson  # optional, faster JSON decoder
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 
 #Set up logging
 log_dir = 'logs' 
@@ -21,6 +31,11 @@ file_handler.setFormatter(formatter)
 logger.addHandler(console_handler) 
 logger.addHandler(file_handler)
 
+# Raw columns a movie's tags are built from, and the version of that logic;
+# bump TAGS_VERSION whenever build_tags changes so cached rows are recomputed.
+TAG_SOURCE_COLUMNS = ['overview', 'genres', 'keywords', 'cast', 'crew']
+TAGS_VERSION = "1"
+
 
 def load_config(config_path: str) -> dict: 
     """
@@ -61,7 +76,7 @@ def convert(text):
         return name_list
 
     except (SyntaxError, ValueError, TypeError) as e:
-        logger.error(f"Error processing input: {obj}, Exception: {e}")
+        logger.error(f"Error processing input: {text}, Exception: {e}")
         return []  # Return an empty list in case of an error
     
 
@@ -109,6 +124,71 @@ def convert_crew(obj):
         logger.error(f"Error processing input: {obj}, Exception: {e}")  # Logging error
         return []  # Return an empty list if there's an error
     
+def extract_names(items):
+    """Extract 'name' from every entry (genres, keywords)."""
+    return [i['name'] for i in items if 'name' in i]
+
+
+def extract_top_cast(items, n=3):
+    """Extract the names of the first n cast members."""
+    return [i['name'] for i in items[:n] if 'name' in i]
+
+
+def extract_directors(items):
+    """Extract the names of crew members whose job is 'Director'."""
+    return [i['name'] for i in items if i.get('job') == 'Director' and 'name' in i]
+
+
+# Extractor applied to each list column, in the order its names appear in the tags
+TAG_EXTRACTORS = {
+    'genres': extract_names,
+    'keywords': extract_names,
+    'cast': extract_top_cast,
+    'crew': extract_directors,
+}
+
+def parse_list_column(column: pd.Series, extractor, backend="json") -> pd.Series:
+    """
+    Parse a stringified list-of-dicts column in one pass and extract fields.
+
+    The TMDB columns are JSON, so the "json" backend decodes them with a JSON
+    parser (orjson when installed) and only falls back to ast.literal_eval
+    for values that are not valid JSON. backend="literal_eval" parses every
+    value with ast.literal_eval, like convert / convert_cast / convert_crew.
+
+    Args:
+        column (pd.Series): Column of stringified lists.
+        extractor (callable): Maps the parsed list to the list of names to keep.
+        backend (str): "json" or "literal_eval".
+
+    Returns:
+        pd.Series: Lists of extracted names, aligned with column.
+    """
+    fallbacks = 0
+
+    def parse(text):
+        nonlocal fallbacks
+        parsed = None
+        if backend == "json":
+            try:
+                parsed = _json_loads(text)
+            except (ValueError, TypeError):
+                fallbacks += 1
+        if parsed is None:
+            try:
+                parsed = ast.literal_eval(text)
+            except (SyntaxError, ValueError, TypeError):
+                return []
+        if not isinstance(parsed, list):
+            return []
+        return extractor(parsed)
+
+    result = pd.Series([parse(text) for text in column.to_numpy()], index=column.index, name=column.name)
+    if fallbacks:
+        logger.debug(f"{fallbacks} values in '{column.name}' were not valid JSON; parsed with literal_eval.")
+    return result
+
+
 def combine_tags(movies):
     """
     Combines multiple columns into a single 'tags' column for content-based recommendations.
@@ -126,6 +206,41 @@ def combine_tags(movies):
         print(f"Error combining tags: {e}")
         return movies
     
+def _join_names(names) -> str:
+    """
+    Join names into one tag string, removing the spaces inside multi-word names.
+    """
+    return " ".join([name.replace(" ", "") for name in names])
+
+
+def build_tags(movies, parser_backend="json") -> pd.Series:
+    """
+    Build the space-joined tag string of every movie from its raw columns.
+
+    Each list column is parsed straight into its joined tag string, so no
+    intermediate list columns are kept; the parts are then concatenated in one
+    pass per row. Output matches the former apply chain (space removal,
+    overview split, combine_tags, join).
+
+    Args:
+        movies (pd.DataFrame): Rows with raw 'overview', 'genres', 'keywords', 'cast' and 'crew' columns.
+        parser_backend (str): List column parser, "json" or "literal_eval".
+
+    Returns:
+        pd.Series: Tag strings aligned with movies.
+    """
+    parts = [[" ".join(text.split()) for text in movies['overview'].to_numpy()]]
+    for column, extractor in TAG_EXTRACTORS.items():
+        logger.info(f"Parsing '{column}' into tags...")
+        joined = parse_list_column(movies[column], lambda items, extractor=extractor: _join_names(extractor(items)),
+                                   parser_backend)
+        parts.append(joined.to_numpy())
+
+    # Unparsable values come back as empty lists; like empty strings they add no tokens
+    tags = [" ".join([part for part in row if part]) for row in zip(*parts)]
+    return pd.Series(tags, index=movies.index, name='tags')
+
+
 def main():
     try:
         # Load config
@@ -133,56 +248,35 @@ def main():
         config = load_config("config/config.yaml")
 
         # Load processed dataset
-        processed_path = config.get("processed_data_path", "data/processed_movies.csv")
+        processed_path = config["paths"].get("processed_data", "data/processed_movies.parquet")
         logger.info(f"Loading processed dataset from {processed_path}...")
-        movies = pd.read_csv(processed_path)
+        movies = read_table(processed_path, columns=['movie_id', 'title', 'overview', 'genres', 'keywords', 'cast', 'crew'])
         logger.info(f"Loaded processed data with shape {movies.shape}")
 
-        # Apply transformation functions
-        logger.info("Applying genre conversion...")
-        movies['genres'] = movies['genres'].apply(convert)
-        logger.debug(f"Sample genres after conversion: {movies['genres'].iloc[0]}")
-
-        logger.info("Applying keyword conversion...")
-        movies['keywords'] = movies['keywords'].apply(convert)
-        logger.debug(f"Sample keywords after conversion: {movies['keywords'].iloc[0]}")
-
-        logger.info("Applying cast conversion (top 3)...")
-        movies['cast'] = movies['cast'].apply(convert_cast)
-        logger.debug(f"Sample cast after conversion: {movies['cast'].iloc[0]}")
-
-        logger.info("Applying crew conversion (director only)...")
-        movies['crew'] = movies['crew'].apply(convert_crew)
-        logger.debug(f"Sample crew after conversion: {movies['crew'].iloc[0]}")
-
-        # Remove spaces in multi-word tokens
-        logger.info("Removing spaces from cast, crew, genres, and keywords...")
-        for col in ['cast', 'crew', 'genres', 'keywords']:
-            movies[col] = movies[col].apply(lambda x: [i.replace(" ", "") for i in x])
-            logger.debug(f"Sample {col} after removing spaces: {movies[col].iloc[0]}")
-
-        # Tokenize the overview
-        logger.info("Tokenizing overview text...")
-        movies['overview'] = movies['overview'].apply(lambda x: x.split())
-        logger.debug(f"Sample overview after tokenization: {movies['overview'].iloc[0]}")
-
-        # Combine into tags column
-        logger.info("Combining all features into 'tags' column...")
-        movies = combine_tags(movies)
+        # Build tags, reusing cached results for rows whose inputs are unchanged
+        parser_backend = config.get("feature_engineering", {}).get("parser", "json")
+        logger.info(f"Parsing list columns with the '{parser_backend}' backend...")
+        cache_config = config.get("row_cache", {})
+        if cache_config.get("enabled", False):
+            # The parser backend is part of the key: backends may parse malformed values differently
+            row_cache = RowCache("feature_engineering", f"{TAGS_VERSION}-{parser_backend}",
+                                 db_path=cache_config.get("db_path", "artifacts/row_cache.sqlite"),
+                                 prune_after_days=cache_config.get("prune_after_days", 30))
+            movies['tags'] = row_cache.apply(movies, TAG_SOURCE_COLUMNS,
+                                             lambda rows: build_tags(rows, parser_backend))
+            row_cache.close()
+        else:
+            movies['tags'] = build_tags(movies, parser_backend)
         logger.debug(f"Sample tags: {movies['tags'].iloc[0]}")
 
         # Drop unnecessary columns
         logger.info("Dropping intermediate columns: overview, genres, keywords, cast, crew...")
-        movies = movies.drop(columns=['overview', 'genres', 'keywords', 'cast', 'crew'])
-
-        print(type(movies['tags'].iloc[0]))
+        movies = movies.drop(columns=TAG_SOURCE_COLUMNS)
 
-        movies['tags'] = movies['tags'].apply(lambda x: " ".join(x))
         # Save transformed data
-        save_path = "data/transformed_data.csv"
+        save_path = config["paths"].get("transformed_data", "data/transformed_data.parquet")
         logger.info(f"Saving transformed data to {save_path}...")
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        movies.to_csv(save_path, index=False)
+        write_table(movies, save_path, export_csv=config["paths"].get("export_csv", False))
         logger.info(f"Transformed data saved successfully with shape {movies.shape}")
 
     except Exception as e:
@@ -1,23 +1,41 @@
 # model_trainer.py placeholder
 import os
+import json
 import pickle
+import hashlib
 import logging
+import multiprocessing
 import yaml
 import pandas as pd
 import numpy as np
+import scipy.sparse as sp
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 
 from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.decomposition import TruncatedSVD
 from sklearn.metrics.pairwise import cosine_similarity
 from nltk.tokenize import word_tokenize
 from nltk.stem import WordNetLemmatizer
 
+from src.components.neighbors import (
+    TopKNeighbors, top_k_indices, save_neighbors, load_neighbors, compute_dtype, encode_scores, PRECISIONS,
+)
+from src.components.neighbor_index import NeighborIndex, build_neighbor_index, patch_neighbors, recall_report
+from src.components.artifacts import save_serving_artifacts
+from src.components.data_io import read_table, write_table
+from src.components.recommender import build_title_index, lookup_title
+from src.components.row_cache import RowCache, hash_rows
+
 # Setup logging
 log_dir = 'logs' 
 os.makedirs(log_dir, exist_ok=True)
 logger = logging.getLogger("model_trainer") 
 logger.setLevel(logging.DEBUG)
 console_handler = logging.StreamHandler() 
-file_handler = logging.FileHandler(os.path.join(log_dir, 'model_trainer.log'), mode='w')
+# Spawned pool workers re-import this module; only the main process truncates the log
+file_mode = 'w' if multiprocessing.current_process().name == 'MainProcess' else 'a'
+file_handler = logging.FileHandler(os.path.join(log_dir, 'model_trainer.log'), mode=file_mode)
 formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s') 
 console_handler.setFormatter(formatter) 
 file_handler.setFormatter(formatter)
@@ -26,6 +44,10 @@ logger.addHandler(file_handler)
 
 lemmatizer = WordNetLemmatizer()
 
+# Version of the per-row lemmatization logic; bump it when apply_lemmatization
+# changes so row-cached results are recomputed.
+LEMMATIZATION_VERSION = "1"
+
 
 def load_config(config_path: str) -> dict:
     """
@@ -58,60 +80,375 @@ def load_params(params_path: str = "params.yaml") -> dict:
         raise
 
 
-def apply_lemmatization(text: str) -> str:
+class LemmaCache:
     """
-    Tokenize and lemmatize input text.
+    Bounded LRU cache of lemmas keyed by lowercased token.
+
+    Movie tags reuse the same vocabulary heavily, so most tokens are looked up
+    in WordNet only once. The cache is persisted as JSON between training runs.
+    """
+
+    def __init__(self, max_size=200000, entries=None):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict(entries or {})
+        self._added = []
+
+    def lemmatize(self, token: str) -> str:
+        key = token.lower()
+        lemma = self._entries.get(key)
+        if lemma is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return lemma
+        self.misses += 1
+        lemma = lemmatizer.lemmatize(key)
+        self._entries[key] = lemma
+        self._added.append(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return lemma
+
+    def update(self, entries: dict):
+        for key, lemma in entries.items():
+            self._entries[key] = lemma
+            self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def pop_added(self) -> dict:
+        """
+        Entries added since the last call (used to ship worker entries back to the parent).
+        """
+        added = {key: self._entries[key] for key in self._added if key in self._entries}
+        self._added = []
+        return added
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @classmethod
+    def load(cls, path, max_size=200000) -> "LemmaCache":
+        entries = None
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    entries = json.load(f)
+                logger.info(f"Loaded {len(entries)} cached lemmas from {path}.")
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Ignoring unreadable lemma cache {path}: {e}")
+        cache = cls(max_size=max_size, entries=entries)
+        cache.update({})  # enforce max_size on a cache saved with a larger bound
+        return cache
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self._entries, f)
+        logger.info(f"Saved {len(self._entries)} cached lemmas to {path}.")
+
+
+def apply_lemmatization(text: str, cache: LemmaCache = None) -> str:
+    """
+    Tokenize and lemmatize input text, through the lemma cache when given.
     """
     try:
         words = word_tokenize(text)
-        return ' '.join([lemmatizer.lemmatize(w.lower()) for w in words if w.isalnum()])
+        lemmatize = cache.lemmatize if cache is not None else (lambda w: lemmatizer.lemmatize(w.lower()))
+        return ' '.join([lemmatize(w) for w in words if w.isalnum()])
     except Exception as e:
         logger.error(f"Lemmatization error: {e}")
         return ''
 
 
-def apply_count_vectorizer(text_list, max_features, stop_words, vectorizer_path="artifacts/vectorizer.pkl"):
+_worker_cache = None
+
+
+def _init_lemmatization_worker(entries, max_size):
+    global _worker_cache
+    _worker_cache = LemmaCache(max_size=max_size, entries=entries)
+
+
+def _lemmatize_shard(texts):
+    hits, misses = _worker_cache.hits, _worker_cache.misses
+    lemmatized = [apply_lemmatization(text, _worker_cache) for text in texts]
+    return lemmatized, _worker_cache.pop_added(), _worker_cache.hits - hits, _worker_cache.misses - misses
+
+
+def lemmatize_tags(tags: pd.Series, workers=1, chunksize=256, cache: LemmaCache = None) -> pd.Series:
+    """
+    Lemmatize a column of tags, sharded across a process pool when workers > 1.
+
+    Shards are mapped in input order, so the parallel output is row-for-row
+    identical to the serial path (workers=1). Each worker starts from a copy
+    of `cache`; the entries workers add and their hit/miss counts are merged
+    back into it.
+    """
+    cache = cache if cache is not None else LemmaCache()
+    if workers <= 1:
+        return tags.apply(apply_lemmatization, cache=cache)
+
+    texts = tags.tolist()
+    shards = [texts[start:start + chunksize] for start in range(0, len(texts), chunksize)]
+    lemmatized = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_lemmatization_worker,
+                             initargs=(dict(cache._entries), cache.max_size)) as executor:
+        for shard_result, added, hits, misses in executor.map(_lemmatize_shard, shards):
+            lemmatized.extend(shard_result)
+            cache.update(added)
+            cache.hits += hits
+            cache.misses += misses
+    return pd.Series(lemmatized, index=tags.index, name=tags.name)
+
+
+def apply_count_vectorizer(text_list, max_features, stop_words, vectorizer_path="artifacts/vectorizer.pkl", dense=False):
     """
     Apply CountVectorizer or load it from pickle if it exists.
+
+    Vectors are returned as a CSR sparse matrix unless dense=True, which keeps
+    the legacy dense array path available for comparison.
     """
     try:
         if os.path.exists(vectorizer_path):
             with open(vectorizer_path, "rb") as f:
                 cv = pickle.load(f)
-            vectors = cv.transform(text_list).toarray()
+            vectors = cv.transform(text_list)
             logger.info("Vectorizer loaded from artifacts.")
         else:
             cv = CountVectorizer(max_features=max_features, stop_words=stop_words)
-            vectors = cv.fit_transform(text_list).toarray()
+            vectors = cv.fit_transform(text_list)
             with open(vectorizer_path, "wb") as f:
                 pickle.dump(cv, f)
             logger.info("Vectorizer trained and saved to artifacts.")
+        if dense:
+            vectors = vectors.toarray()
+        else:
+            logger.info(f"Sparse vectors: {vectors.shape}, nnz={vectors.nnz} ({vectors.nnz / max(1, np.prod(vectors.shape)):.4%} dense).")
         return cv, vectors
     except Exception as e:
         logger.error(f"CountVectorizer error: {e}")
         return None, np.array([])
 
 
-def get_recommendations(movie_title, df, similarity_matrix, top_n=5):
+def apply_svd(vectors, n_components, svd_path="artifacts/svd.pkl", random_state=42, dtype=np.float32, fit=True):
+    """
+    Project count vectors onto a latent-semantic space with TruncatedSVD.
+
+    A persisted projection with the same number of components is reused, so
+    new items are folded in with transform() instead of refitting. With
+    fit=False a missing or mismatched projection is an error rather than
+    being refitted on `vectors`.
+    Returns dense vectors of shape (N, n_components) in `dtype`.
+    """
+    try:
+        svd = None
+        if os.path.exists(svd_path):
+            with open(svd_path, "rb") as f:
+                svd = pickle.load(f)
+            if svd.n_components != n_components or svd.components_.shape[1] != vectors.shape[1]:
+                logger.info("Persisted SVD does not match the configuration; refitting.")
+                svd = None
+
+        if svd is not None:
+            reduced = svd.transform(vectors)
+            logger.info("SVD projection loaded from artifacts.")
+        elif not fit:
+            raise ValueError(f"No SVD projection matching {n_components} components at {svd_path}.")
+        else:
+            svd = TruncatedSVD(n_components=n_components, random_state=random_state)
+            reduced = svd.fit_transform(vectors)
+            with open(svd_path, "wb") as f:
+                pickle.dump(svd, f)
+            logger.info(f"SVD fitted ({n_components} components, "
+                        f"{svd.explained_variance_ratio_.sum():.2%} variance explained) and saved to artifacts.")
+        return svd, reduced.astype(dtype)
+    except Exception as e:
+        logger.error(f"SVD error: {e}")
+        raise
+
+
+def content_hashes(df: pd.DataFrame, columns=("title", "tags")) -> pd.Series:
+    """
+    Hash the fields a movie's vector is built from, one short hex digest per row.
+
+    Computed on the raw (pre-lemmatization) fields, so a row whose hash is
+    unchanged since the last run can reuse its stored vector.
+    """
+    return hash_rows(df, list(columns))
+
+
+def save_vectors(vectors, path="artifacts/vectors.npz"):
+    """
+    Persist item vectors (CSR or dense) for incremental retraining.
+    """
+    if sp.issparse(vectors):
+        sp.save_npz(path, vectors.tocsr())
+    else:
+        np.savez(path, vectors=vectors)
+    logger.info(f"Vectors {vectors.shape} saved to {path}.")
+
+
+def load_vectors(path="artifacts/vectors.npz"):
+    """
+    Load vectors written by save_vectors.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        if "vectors" in data.files:
+            return data["vectors"]
+    return sp.load_npz(path)
+
+
+def file_digest(path) -> str:
+    """
+    SHA-256 of a file's bytes, or None if it does not exist.
+    """
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def training_fingerprint(settings: dict, vectorizer_path="artifacts/vectorizer.pkl",
+                         svd_path="artifacts/svd.pkl") -> dict:
+    """
+    Describe how the stored vectors and neighbor lists were produced.
+
+    Combines the training settings with digests of the fitted vectorizer and
+    (when enabled) SVD projection. Incremental updates are only valid while
+    the fingerprint of the current configuration equals the stored one.
+    """
+    fingerprint = {
+        **settings,
+        "vectorizer": file_digest(vectorizer_path),
+        "svd_model": file_digest(svd_path) if settings.get("svd", {}).get("enabled", False) else None,
+    }
+    # Round-trip through JSON so it compares equal to a loaded fingerprint
+    return json.loads(json.dumps(fingerprint, sort_keys=True))
+
+
+def save_training_fingerprint(fingerprint: dict, path="artifacts/training_state.json"):
+    with open(path, "w") as f:
+        json.dump(fingerprint, f, indent=2, sort_keys=True)
+    logger.info(f"Training fingerprint saved to {path}.")
+
+
+def load_training_state(movies_path="artifacts/movies.pkl", vectors_path="artifacts/vectors.npz",
+                        neighbors_path="artifacts/neighbors.npz", fingerprint_path="artifacts/training_state.json"):
+    """
+    Load the catalog, vectors, neighbor lists and fingerprint of the previous run.
+
+    Returns:
+        tuple: (movies, vectors, neighbors, fingerprint), or None if any artifact is missing.
+    """
+    missing = [path for path in (movies_path, vectors_path, neighbors_path, fingerprint_path)
+               if not os.path.exists(path)]
+    if missing:
+        logger.info(f"No previous training state ({', '.join(missing)} missing); training from scratch.")
+        return None
+    with open(movies_path, "rb") as f:
+        movies = pickle.load(f)
+    with open(fingerprint_path, "r") as f:
+        fingerprint = json.load(f)
+    return movies, load_vectors(vectors_path), load_neighbors(neighbors_path), fingerprint
+
+
+def plan_incremental_update(df: pd.DataFrame, previous: pd.DataFrame, max_changed_fraction=0.2):
+    """
+    Line the current catalog up with the previously trained one by movie_id.
+
+    Previously trained movies keep their row positions and new movies are
+    appended, so existing neighbor lists stay valid. A full retrain is needed
+    when movies were removed, ids are ambiguous, the previous catalog has no
+    content hashes, or too large a share of rows changed.
+
+    Args:
+        df (pd.DataFrame): Current catalog with a 'content_hash' column.
+        previous (pd.DataFrame): Catalog saved by the previous run.
+        max_changed_fraction (float): Largest share of changed + new rows handled incrementally.
+
+    Returns:
+        tuple: (ordered_df, updated_rows) or None if a full retrain is required.
+    """
+    if "content_hash" not in previous.columns:
+        logger.info("Previous catalog has no content hashes; full retrain.")
+        return None
+    if df["movie_id"].duplicated().any() or previous["movie_id"].duplicated().any():
+        logger.info("Duplicate movie ids in the catalog; full retrain.")
+        return None
+    removed = (~previous["movie_id"].isin(df["movie_id"])).sum()
+    if removed:
+        logger.info(f"{removed} movies were removed since the last run; full retrain.")
+        return None
+
+    new_rows = df[~df["movie_id"].isin(previous["movie_id"])]
+    kept_rows = df.set_index("movie_id").loc[previous["movie_id"]].reset_index()[df.columns]
+    ordered = pd.concat([kept_rows, new_rows], ignore_index=True)
+
+    changed = np.flatnonzero(kept_rows["content_hash"].to_numpy() != previous["content_hash"].to_numpy())
+    updated_rows = np.concatenate([changed, np.arange(len(previous), len(ordered))])
+    logger.info(f"Incremental plan: {len(changed)} changed and {len(new_rows)} new movies "
+                f"out of {len(ordered)}.")
+    if len(updated_rows) > max_changed_fraction * len(ordered):
+        logger.info(f"More than {max_changed_fraction:.0%} of the catalog changed; full retrain.")
+        return None
+    return ordered, updated_rows
+
+
+def replace_rows(vectors, rows, replacement):
+    """
+    Return `vectors` with `rows` replaced by `replacement`; rows past the end are appended.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    n_previous = vectors.shape[0]
+    n_total = max(n_previous, int(rows.max()) + 1) if len(rows) else n_previous
+    if sp.issparse(vectors) or sp.issparse(replacement):
+        kept = np.setdiff1d(np.arange(n_previous), rows)
+        stacked = sp.vstack([sp.csr_matrix(vectors)[kept], sp.csr_matrix(replacement)]).tocsr()
+        position = np.empty(n_total, dtype=np.int64)
+        position[kept] = np.arange(len(kept))
+        position[rows] = len(kept) + np.arange(len(rows))
+        return stacked[position]
+    result = np.empty((n_total, vectors.shape[1]), dtype=vectors.dtype)
+    result[:n_previous] = vectors
+    result[rows] = replacement
+    return result
+
+
+def get_recommendations(movie_title, df, similarity_matrix, top_n=5, title_index=None):
     """
     Recommend top N similar movies for a given movie title.
+
+    similarity_matrix may be a dense N x N similarity matrix, a TopKNeighbors
+    artifact or a NeighborIndex queried on demand. Pass a prebuilt title_index (see
+    build_title_index) to avoid rebuilding it on every call.
     """
     try:
-        movie_title = movie_title.lower()
-        titles_lower = df['title'].str.lower()
+        if title_index is None:
+            title_index = build_title_index(df['title'])
 
-        if movie_title not in titles_lower.values:
+        idx = lookup_title(title_index, movie_title)
+        if idx is None:
             logger.warning(f"Movie '{movie_title}' not found.")
             return []
 
-        idx = titles_lower[titles_lower == movie_title].index[0]
+        if isinstance(similarity_matrix, NeighborIndex):
+            indices, _ = similarity_matrix.query([idx], top_n)
+            return df.iloc[indices[0]]["title"].tolist()
 
-        similarity_scores = similarity_matrix[idx]
-        sorted_indices = np.argsort(similarity_scores)[::-1]
+        if isinstance(similarity_matrix, TopKNeighbors):
+            if top_n > similarity_matrix.k:
+                logger.warning(f"Requested {top_n} recommendations but artifact only stores {similarity_matrix.k}.")
+            return df.iloc[similarity_matrix.indices[idx][:top_n]]["title"].tolist()
 
-        # Remove the movie itself and get top N
-        sorted_indices = [i for i in sorted_indices if i != idx][:top_n]
-        recommended_titles = df.iloc[sorted_indices]["title"].tolist()
+        # Top N without the movie itself
+        top_indices = top_k_indices(similarity_matrix[idx], top_n, exclude=idx)
+        recommended_titles = df.iloc[top_indices]["title"].tolist()
         return recommended_titles
 
     except Exception as e:
@@ -135,6 +472,21 @@ def main():
         max_features = model_params.get("max_features", 5000)
         stop_words = model_params.get("stop_words", "english")
         top_n_recommendations = model_params.get("top_n_recommendations", 5)
+        top_k_neighbors = model_params.get("top_k_neighbors", 50)
+        similarity_output = model_params.get("similarity_output", "topk")
+        similarity_chunk_size = model_params.get("similarity_chunk_size", 1024)
+        similarity_workers = model_params.get("similarity_workers", 1) or os.cpu_count()
+        dense_vectors = model_params.get("dense_vectors", False)
+        precision = model_params.get("precision", "float32")
+        serving_mode = model_params.get("serving_mode", "precomputed")
+        dtype = compute_dtype(precision)
+        index_params = model_params.get("neighbor_index", {})
+        index_backend = index_params.get("backend", "exact")
+        index_options = index_params.get(index_backend) or {}
+        recall_sample = index_params.get("recall_sample", 500)
+        svd_params = model_params.get("svd", {})
+        lemmatization_params = model_params.get("lemmatization", {})
+        incremental_params = model_params.get("incremental", {})
 
         transformed_path = config["paths"]["transformed_data"]
 
@@ -142,38 +494,161 @@ def main():
             logger.error(f"Transformed data file missing: {transformed_path}")
             raise FileNotFoundError(f"Missing file: {transformed_path}")
 
-        df = pd.read_csv(transformed_path)
+        df = read_table(transformed_path, columns=["movie_id", "title", "tags"])
         logger.info(f"Loaded transformed data: {df.shape}")
 
-        # Lemmatize tags
-        df['tags'] = df['tags'].apply(apply_lemmatization)
-        logger.info(" Lemmatization applied to tags.")
-
-        # Vectorization
-        cv, vectors = apply_count_vectorizer(df['tags'], max_features, stop_words)
-        if vectors.size == 0:
-            raise ValueError("❌ Vectorization failed. No vectors returned.")
+        # Attach precomputed poster paths so serving needs no TMDB calls
+        poster_paths_path = config["paths"].get("poster_paths")
+        if poster_paths_path and os.path.exists(poster_paths_path):
+            posters = read_table(poster_paths_path, columns=["movie_id", "poster_path"]).fillna("")
+            poster_map = dict(zip(posters["movie_id"], posters["poster_path"]))
+            df["poster_path"] = df["movie_id"].map(poster_map).fillna("")
+            logger.info(f"Attached poster paths for {(df['poster_path'] != '').sum()} movies.")
 
-        # Similarity matrix
-        similarity = cosine_similarity(vectors)
-        logger.info(" Cosine similarity computed.")
-
-        # Save artifacts
+        # Lemmatize tags
+        lemmatization_workers = lemmatization_params.get("workers", 1) or os.cpu_count()
+        lemma_cache_path = lemmatization_params.get("cache_path", "artifacts/lemma_cache.json")
+        lemma_cache = LemmaCache.load(lemma_cache_path, max_size=lemmatization_params.get("cache_size", 200000))
+
+        cache_config = config.get("row_cache", {})
+        row_cache = None
+        if cache_config.get("enabled", False):
+            row_cache = RowCache("lemmatization", LEMMATIZATION_VERSION,
+                                 db_path=cache_config.get("db_path", "artifacts/row_cache.sqlite"),
+                                 prune_after_days=cache_config.get("prune_after_days", 30))
+
+        def lemmatize(tags):
+            def compute(rows):
+                return lemmatize_tags(rows['tags'], workers=lemmatization_workers,
+                                      chunksize=lemmatization_params.get("chunksize", 256), cache=lemma_cache)
+            frame = tags.to_frame('tags')
+            return compute(frame) if row_cache is None else row_cache.apply(frame, ['tags'], compute)
+
+        # Everything the stored vectors and neighbor lists depend on
+        training_settings = {
+            "max_features": max_features,
+            "stop_words": stop_words,
+            "dense_vectors": dense_vectors,
+            "precision": precision,
+            "top_k_neighbors": top_k_neighbors,
+            "lemmatization_version": LEMMATIZATION_VERSION,
+            "svd": svd_params if svd_params.get("enabled", False) else {"enabled": False},
+            "neighbor_index": {"backend": index_backend, "options": index_options},
+        }
+
+        # Incremental retraining: only changed and new movies are re-vectorized
+        df["content_hash"] = content_hashes(df)
+        plan = None
+        if incremental_params.get("enabled", False) and similarity_output != "dense":
+            state = load_training_state()
+            if index_backend != "exact":
+                logger.info(f"Neighbor lists of the '{index_backend}' backend are approximate and cannot be "
+                            f"patched; full retrain.")
+            elif state is not None:
+                previous_df, previous_vectors, previous_neighbors, previous_fingerprint = state
+                fingerprint = training_fingerprint(training_settings)
+                changed = sorted(key for key in set(fingerprint) | set(previous_fingerprint)
+                                 if fingerprint.get(key) != previous_fingerprint.get(key))
+                if changed:
+                    logger.info(f"Training setup changed since the last run ({', '.join(changed)}); full retrain.")
+                else:
+                    plan = plan_incremental_update(df, previous_df,
+                                                   incremental_params.get("max_changed_fraction", 0.2))
+                if plan is not None and previous_neighbors.k != max(0, min(top_k_neighbors, len(plan[0]) - 1)):
+                    logger.info("top_k_neighbors changed since the last run; full retrain.")
+                    plan = None
+
+        if plan is not None:
+            df, updated_rows = plan
+            unchanged = np.setdiff1d(np.arange(len(previous_df)), updated_rows)
+            tags = df["tags"].to_numpy(dtype=object)
+            tags[unchanged] = previous_df["tags"].to_numpy(dtype=object)[unchanged]
+            if len(updated_rows):
+                tags[updated_rows] = lemmatize(df["tags"].iloc[updated_rows]).to_numpy(dtype=object)
+            df["tags"] = tags
+
+            vectors = previous_vectors
+            if len(updated_rows):
+                _, updated_vectors = apply_count_vectorizer(df["tags"].iloc[updated_rows], max_features, stop_words,
+                                                            dense=dense_vectors)
+                if svd_params.get("enabled", False):
+                    # Fold the rows into the persisted projection; never refit it on the updated rows alone
+                    _, updated_vectors = apply_svd(updated_vectors, svd_params.get("n_components", 200),
+                                                   random_state=svd_params.get("random_state", 42), dtype=dtype,
+                                                   fit=False)
+                if updated_vectors.shape[1] != previous_vectors.shape[1]:
+                    raise ValueError(f"Updated vectors have {updated_vectors.shape[1]} dimensions but the persisted "
+                                     f"ones {previous_vectors.shape[1]}; delete artifacts/training_state.json "
+                                     f"to retrain from scratch.")
+                vectors = replace_rows(previous_vectors, updated_rows, updated_vectors)
+
+            index = build_neighbor_index(vectors, "exact", dtype=dtype)
+            neighbors = patch_neighbors(index, previous_neighbors, updated_rows)
+            logger.info(f" Incremental update applied to {len(updated_rows)} of {len(df)} movies.")
+        else:
+            df['tags'] = lemmatize(df['tags'])
+            logger.info(f" Lemmatization applied to tags ({lemmatization_workers} worker(s)).")
+
+            # Vectorization
+            cv, vectors = apply_count_vectorizer(df['tags'], max_features, stop_words, dense=dense_vectors)
+            if vectors.shape[0] == 0:
+                raise ValueError("❌ Vectorization failed. No vectors returned.")
+
+            # Optional latent-semantic projection before similarity
+            if svd_params.get("enabled", False):
+                _, vectors = apply_svd(vectors, svd_params.get("n_components", 200),
+                                       random_state=svd_params.get("random_state", 42), dtype=dtype)
+
+            # Similarity neighbors
+            index = build_neighbor_index(vectors, index_backend, dtype=dtype, **index_options)
+            neighbors = index.all_neighbors(top_k_neighbors, similarity_chunk_size, workers=similarity_workers)
+
+        lemma_cache.save(lemma_cache_path)
+        if row_cache is not None:
+            row_cache.close()
+        logger.info(f"Lemma cache hit rate {lemma_cache.hit_rate:.2%} "
+                    f"({lemma_cache.hits} hits, {lemma_cache.misses} misses).")
+
+        # Recall of the chosen backend against exact cosine neighbors
+        report = recall_report(index, neighbors, sample_size=recall_sample)
+        os.makedirs("reports", exist_ok=True)
+        with open("reports/neighbor_index.json", "w") as f:
+            json.dump(report, f, indent=2)
+
+        # Save artifacts; the fingerprint is dropped first and written last, so an
+        # interrupted save never pairs an old fingerprint with new vectors
         os.makedirs("artifacts", exist_ok=True)
+        if os.path.exists("artifacts/training_state.json"):
+            os.remove("artifacts/training_state.json")
         with open("artifacts/movies.pkl", "wb") as f:
             pickle.dump(df, f)
-        with open("artifacts/similarity.pkl", "wb") as f:
-            pickle.dump(similarity, f)
+        neighbors = TopKNeighbors(indices=neighbors.indices, scores=encode_scores(neighbors.scores, precision))
+        save_neighbors(neighbors, "artifacts/neighbors.npz")
+        # Dense vectors are stored in the score precision; int8 is score-only and scipy.sparse has no float16
+        vector_dtype = dtype if precision == "int8" or sp.issparse(vectors) else PRECISIONS[precision]
+        save_vectors(vectors.astype(vector_dtype), "artifacts/vectors.npz")
+        save_training_fingerprint(training_fingerprint(training_settings), "artifacts/training_state.json")
+        save_serving_artifacts(df, neighbors, "artifacts/serving", mode=serving_mode,
+                               vectors=index.vectors.astype(vector_dtype))
+        if similarity_output == "dense":
+            similarity = encode_scores(cosine_similarity(vectors.astype(dtype)), precision)
+            logger.info(" Cosine similarity computed.")
+            with open("artifacts/similarity.pkl", "wb") as f:
+                pickle.dump(similarity, f)
+            logger.info("Dense similarity matrix saved to artifacts/similarity.pkl.")
 
         logger.info(" Artifacts saved to 'artifacts/'.")
 
         # Save processed data
-        df.to_csv("data/processed_data.csv", index=False)
-        logger.info("Processed data saved to data/processed_data.csv")
+        trained_path = config["paths"].get("trained_data", "data/processed_data.parquet")
+        write_table(df, trained_path, export_csv=config["paths"].get("export_csv", False))
+        logger.info(f"Processed data saved to {trained_path}")
 
         # Example recommendation
         example_movie = df['title'].iloc[0]
-        recommendations = get_recommendations(example_movie, df, similarity, top_n=top_n_recommendations)
+        title_index = build_title_index(df['title'])
+        recommendations = get_recommendations(example_movie, df, neighbors, top_n=top_n_recommendations,
+                                              title_index=title_index)
 
         print(f"\n🎬 Top {top_n_recommendations} recommendations for '{example_movie}':")
         for i, rec in enumerate(recommendations, 1):
@@ -182,6 +657,7 @@ def main():
     except Exception as e:
         logger.error(f"Pipeline failed: {e}")
         print(f"❌ Error: {e}")
+        raise
 
 
 if __name__ == "__main__":
@@ -0,0 +1,459 @@
+# neighbor_index.py
+import os
+import copy
+import time
+import logging
+import multiprocessing
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+from threadpoolctl import threadpool_limits
+
+from src.components.neighbors import TopKNeighbors, decode_scores, select_top_k, top_k_indices
+
+# Setup logging
+log_dir = 'logs'
+os.makedirs(log_dir, exist_ok=True)
+logger = logging.getLogger("neighbor_index")
+logger.setLevel(logging.DEBUG)
+console_handler = logging.StreamHandler()
+# Spawned pool workers re-import this module; only the main process truncates the log
+file_mode = 'w' if multiprocessing.current_process().name == 'MainProcess' else 'a'
+file_handler = logging.FileHandler(os.path.join(log_dir, 'neighbor_index.log'), mode=file_mode)
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+
+def _to_dense(matrix) -> np.ndarray:
+    return matrix.toarray() if sp.issparse(matrix) else np.asarray(matrix)
+
+
+def _dump_vectors(vectors, directory) -> dict:
+    """
+    Write vectors as .npy files (CSR as data/indices/indptr) that workers can memory-map.
+    """
+    if sp.issparse(vectors):
+        vectors = vectors.tocsr()
+        parts = {"data": vectors.data, "indices": vectors.indices, "indptr": vectors.indptr}
+        spec = {"format": "csr", "shape": vectors.shape}
+    else:
+        parts = {"dense": np.ascontiguousarray(vectors)}
+        spec = {"format": "dense"}
+    for name, array in parts.items():
+        spec[name] = os.path.join(directory, f"{name}.npy")
+        np.save(spec[name], array)
+    return spec
+
+
+def _open_vectors(spec):
+    if spec["format"] == "csr":
+        parts = tuple(np.load(spec[name], mmap_mode="r") for name in ("data", "indices", "indptr"))
+        return sp.csr_matrix(parts, shape=spec["shape"], copy=False)
+    return np.load(spec["dense"], mmap_mode="r")
+
+
+# Per-process state of similarity workers, set by _init_neighbor_worker
+_worker_index = None
+_worker_limits = None
+
+
+def _init_neighbor_worker(index, spec):
+    global _worker_index, _worker_limits
+    # One BLAS thread per process: the pool is the parallelism
+    _worker_limits = threadpool_limits(limits=1)
+    index.vectors = _open_vectors(spec)
+    _worker_index = index
+
+
+def _neighbor_shard(task):
+    start, stop, k = task
+    # Counters of this shard only; the parent sums them over all shards
+    _worker_index.counters = dict.fromkeys(_worker_index.counters, 0)
+    indices, scores = _worker_index.query(np.arange(start, stop), k)
+    return start, indices, scores, _worker_index.counters
+
+
+class NeighborIndex:
+    """
+    Cosine-similarity neighbor index over the catalog's item vectors.
+
+    Vectors are cast to `dtype` and L2-normalized once (CSR input stays
+    sparse) so every score is a plain dot product. Subclasses implement `query`
+    and may keep integer query counters in `counters`, summarized by
+    `query_summary`.
+
+    Args:
+        vectors (np.ndarray or scipy.sparse matrix): Item vectors of shape (N, d).
+        dtype: Float dtype of the vectors and of every similarity score.
+        normalized (bool): Vectors are already L2-normalized `dtype` vectors (e.g. loaded
+            from serving artifacts) and are used as-is, without a copy.
+    """
+
+    name = "base"
+
+    def __init__(self, vectors, dtype=np.float32, normalized=False):
+        self.dtype = np.dtype(dtype)
+        self.vectors = vectors if normalized else normalize(vectors.astype(self.dtype), norm="l2")
+        self.n_items = self.vectors.shape[0]
+        self.counters = {}
+
+    def query(self, rows, k):
+        """
+        Top-k neighbors of catalog rows, each row excluded from its own list.
+
+        Returns:
+            tuple: (indices, scores) as int32 / `dtype` arrays of shape (len(rows), min(k, N - 1)).
+        """
+        raise NotImplementedError
+
+    def query_summary(self) -> dict:
+        """
+        Backend-specific statistics of the queries answered so far (empty for exact backends).
+        """
+        return {}
+
+    def all_neighbors(self, k, chunk_size=1024, workers=1) -> TopKNeighbors:
+        """
+        Top-k neighbor lists for the whole catalog, computed `chunk_size` rows at a time.
+
+        With workers > 1 the row chunks are sharded across a process pool.
+        The normalized vectors are written once to shared memory (/dev/shm
+        when available) and memory-mapped by every worker instead of being
+        pickled to each; every shard is written back at its row offset, so
+        the result is identical to the serial path.
+        """
+        k = max(0, min(k, self.n_items - 1))
+        indices = np.empty((self.n_items, k), dtype=np.int32)
+        scores = np.empty((self.n_items, k), dtype=self.dtype)
+        tasks = [(start, min(start + chunk_size, self.n_items), k) for start in range(0, self.n_items, chunk_size)]
+
+        if workers > 1 and len(tasks) > 1:
+            shared_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+            with tempfile.TemporaryDirectory(prefix="neighbor_index_", dir=shared_dir) as directory:
+                spec = _dump_vectors(self.vectors, directory)
+                shell = copy.copy(self)
+                shell.vectors = None
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_neighbor_worker,
+                                         initargs=(shell, spec)) as executor:
+                    for start, shard_indices, shard_scores, counters in executor.map(_neighbor_shard, tasks):
+                        stop = start + len(shard_indices)
+                        indices[start:stop], scores[start:stop] = shard_indices, shard_scores
+                        for name, value in counters.items():
+                            self.counters[name] += value
+        else:
+            for start, stop, _ in tasks:
+                indices[start:stop], scores[start:stop] = self.query(np.arange(start, stop), k)
+
+        logger.info(f"[{self.name}] Top-{k} neighbors computed for {self.n_items} movies in chunks of {chunk_size} "
+                    f"({max(1, workers)} worker(s)).")
+        summary = self.query_summary()
+        if summary:
+            logger.info(f"[{self.name}] Query stats: {summary}")
+        return TopKNeighbors(indices=indices, scores=scores)
+
+
+class ExactIndex(NeighborIndex):
+    """
+    Exact all-pairs cosine similarity.
+
+    Each query block is multiplied against the full catalog (sparse-sparse
+    when the vectors are CSR) and reduced to its top-k, so peak memory is
+    O(len(rows) x N).
+    """
+
+    name = "exact"
+
+    def query(self, rows, k):
+        rows = np.asarray(rows, dtype=np.int64)
+        block = _to_dense(self.vectors[rows] @ self.vectors.T)
+        return select_top_k(block, k, exclude=rows, dtype=self.dtype)
+
+
+class LSHIndex(NeighborIndex):
+    """
+    Approximate cosine neighbors with random-hyperplane LSH.
+
+    Every item is hashed into `n_tables` tables by the signs of `n_bits`
+    random projections. A query's candidates are the items sharing a bucket
+    with it in any table; they are re-ranked with exact dot products. Rows
+    with fewer than k candidates fall back to an exact scan; the share of
+    fallbacks and the mean candidate count are reported by `query_summary`.
+    The defaults give buckets of roughly N / 64 items, enough candidates for
+    K=50 on a few thousand movies; raise n_bits as the catalog grows.
+
+    Args:
+        vectors: Item vectors of shape (N, d).
+        n_tables (int): Number of hash tables (more tables = higher recall, more candidates).
+        n_bits (int): Hyperplanes per table (more bits = smaller buckets).
+        seed (int): Seed of the random hyperplanes.
+        dtype: Float dtype of the vectors and scores.
+    """
+
+    name = "lsh"
+
+    def __init__(self, vectors, n_tables=8, n_bits=6, seed=42, dtype=np.float32):
+        super().__init__(vectors, dtype)
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.counters = {"rows": 0, "candidates": 0, "fallbacks": 0}
+
+        rng = np.random.default_rng(seed)
+        planes = rng.standard_normal((self.vectors.shape[1], n_tables * n_bits)).astype(self.dtype)
+        bits = _to_dense(self.vectors @ planes) > 0
+        weights = np.left_shift(1, np.arange(n_bits, dtype=np.int64))
+        self.keys = bits.reshape(self.n_items, n_tables, n_bits).astype(np.int64) @ weights
+
+        # Per table: sorted unique keys and, for each, the slice of item ids in that bucket
+        self.tables = []
+        for table in range(n_tables):
+            order = np.argsort(self.keys[:, table], kind="stable")
+            unique_keys, starts, counts = np.unique(self.keys[order, table], return_index=True, return_counts=True)
+            self.tables.append((unique_keys, starts, starts + counts, order))
+
+        bucket_sizes = np.concatenate([ends - starts for _, starts, ends, _ in self.tables])
+        logger.info(f"[lsh] Built {n_tables} tables x {n_bits} bits; mean bucket size {bucket_sizes.mean():.1f}.")
+
+    def candidates(self, row) -> np.ndarray:
+        """
+        Items sharing at least one bucket with `row`, excluding the row itself.
+        """
+        parts = []
+        for table, (unique_keys, starts, ends, order) in enumerate(self.tables):
+            bucket = np.searchsorted(unique_keys, self.keys[row, table])
+            parts.append(order[starts[bucket]:ends[bucket]])
+        candidates = np.unique(np.concatenate(parts))
+        return candidates[candidates != row]
+
+    def query(self, rows, k):
+        rows = np.asarray(rows, dtype=np.int64)
+        k = max(0, min(k, self.n_items - 1))
+        indices = np.empty((len(rows), k), dtype=np.int32)
+        scores = np.empty((len(rows), k), dtype=self.dtype)
+        for position, row in enumerate(rows):
+            candidates = self.candidates(row)
+            self.counters["rows"] += 1
+            self.counters["candidates"] += len(candidates)
+            if len(candidates) < k:
+                self.counters["fallbacks"] += 1
+                candidates = np.delete(np.arange(self.n_items), row)
+            candidate_scores = _to_dense(self.vectors[candidates] @ self.vectors[row].T).ravel()
+            top = top_k_indices(candidate_scores, k)
+            indices[position] = candidates[top]
+            scores[position] = candidate_scores[top]
+        return indices, scores
+
+    def query_summary(self) -> dict:
+        rows = max(1, self.counters["rows"])
+        return {
+            "rows_queried": int(self.counters["rows"]),
+            "fallback_fraction": round(self.counters["fallbacks"] / rows, 4),
+            "mean_candidates": round(self.counters["candidates"] / rows, 1),
+        }
+
+
+def patch_neighbors(index: ExactIndex, neighbors: TopKNeighbors, updated_rows) -> TopKNeighbors:
+    """
+    Patch existing neighbor lists after some catalog rows changed or were appended.
+
+    `index` covers the updated catalog; `neighbors` holds the lists of the
+    previous catalog, whose rows keep their positions (new rows are appended
+    after them); stored scores of any precision are decoded first. Only an
+    m x N similarity block for the m updated rows is computed, so the cost is
+    linear in catalog size:
+
+    * updated rows get fresh exact lists from that block;
+    * existing rows whose list referenced a changed row are recomputed exactly,
+      since the changed row's score may have dropped;
+    * every other row merges the updated rows' scores into its current top-K.
+
+    Returns:
+        TopKNeighbors: Lists for all rows of the updated catalog.
+    """
+    updated = np.unique(np.asarray(updated_rows, dtype=np.int64))
+    n_previous, k = len(neighbors), neighbors.k
+    indices = np.empty((index.n_items, k), dtype=np.int32)
+    scores = np.empty((index.n_items, k), dtype=index.dtype)
+    indices[:n_previous] = neighbors.indices
+    scores[:n_previous] = decode_scores(neighbors.scores)
+    if len(updated) == 0:
+        return TopKNeighbors(indices=indices, scores=scores)
+
+    block = _to_dense(index.vectors[updated] @ index.vectors.T)
+    indices[updated], scores[updated] = select_top_k(block, k, exclude=updated, dtype=index.dtype)
+
+    untouched = np.setdiff1d(np.arange(n_previous), updated)
+    changed = updated[updated < n_previous]
+    stale_mask = np.isin(neighbors.indices[untouched], changed).any(axis=1)
+    stale = untouched[stale_mask]
+    if len(stale):
+        indices[stale], scores[stale] = index.query(stale, k)
+
+    rest = untouched[~stale_mask]
+    if len(rest):
+        candidate_indices = np.hstack([neighbors.indices[rest], np.broadcast_to(updated, (len(rest), len(updated)))])
+        candidate_scores = np.hstack([scores[rest], block[:, rest].T])
+        order = np.argsort(-candidate_scores, axis=1, kind="stable")[:, :k]
+        indices[rest] = np.take_along_axis(candidate_indices, order, axis=1)
+        scores[rest] = np.take_along_axis(candidate_scores, order, axis=1)
+
+    logger.info(f"Patched neighbors: {len(updated)} updated rows, {len(stale)} stale rows recomputed, "
+                f"{len(rest)} rows merged.")
+    return TopKNeighbors(indices=indices, scores=scores)
+
+
+class LazyNeighbors:
+    """
+    Top-k neighbor lists computed on demand instead of precomputed for every movie.
+
+    Serving counterpart of TopKNeighbors for the "lazy" serving mode: only the
+    normalized item vectors are loaded (O(N x d) instead of a stored list per
+    movie), each missing row costs one `vectors @ vectors[row]` product, and the
+    most recently used `cache_size` rows are kept in an LRU.
+
+    Args:
+        index (NeighborIndex): Index over the catalog, usually an ExactIndex over stored vectors.
+        k (int): Neighbors computed per row.
+        cache_size (int): Rows kept in the LRU.
+        chunk_size (int): Missing rows computed per block (peak memory ~ chunk x N).
+    """
+
+    def __init__(self, index: NeighborIndex, k=50, cache_size=1024, chunk_size=1024):
+        self.index = index
+        self._k = max(0, min(k, index.n_items - 1))
+        self.cache_size = cache_size
+        self.chunk_size = chunk_size
+        self._rows = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def k(self) -> int:
+        return self._k
+
+    def __len__(self) -> int:
+        return self.index.n_items
+
+    def query(self, rows, top_n):
+        """
+        Neighbor indices and scores of catalog rows, capped at k.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        top_n = min(top_n, self.k)
+        found = {}
+        with self._lock:
+            for row in dict.fromkeys(rows.tolist()):
+                if row in self._rows:
+                    self._rows.move_to_end(row)
+                    found[row] = self._rows[row]
+            self.hits += len(found)
+
+        missing = np.array([row for row in dict.fromkeys(rows.tolist()) if row not in found], dtype=np.int64)
+        for start in range(0, len(missing), self.chunk_size):
+            block = missing[start:start + self.chunk_size]
+            indices, scores = self.index.query(block, self.k)
+            for position, row in enumerate(block.tolist()):
+                found[row] = (indices[position], scores[position])
+
+        if len(missing):
+            with self._lock:
+                self.misses += len(missing)
+                for row in missing[max(0, len(missing) - self.cache_size):].tolist():
+                    self._rows[row] = found[row]
+                    self._rows.move_to_end(row)
+                while len(self._rows) > self.cache_size:
+                    self._rows.popitem(last=False)
+
+        indices = np.empty((len(rows), top_n), dtype=np.int32)
+        scores = np.empty((len(rows), top_n), dtype=self.index.dtype)
+        for position, row in enumerate(rows.tolist()):
+            indices[position], scores[position] = found[row][0][:top_n], found[row][1][:top_n]
+        return indices, scores
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "cached_rows": len(self._rows),
+        }
+
+
+BACKENDS = {
+    ExactIndex.name: ExactIndex,
+    LSHIndex.name: LSHIndex,
+}
+
+
+def build_neighbor_index(vectors, backend="exact", **options) -> NeighborIndex:
+    """
+    Build a neighbor index with the named backend ("exact" or "lsh").
+
+    Extra keyword options (such as dtype) are passed to the backend's constructor.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown neighbor index backend '{backend}'. Choose from {sorted(BACKENDS)}.")
+    started = time.perf_counter()
+    index = BACKENDS[backend](vectors, **options)
+    logger.info(f"Neighbor index '{backend}' built in {time.perf_counter() - started:.2f}s.")
+    return index
+
+
+def recall_report(index: NeighborIndex, neighbors: TopKNeighbors, sample_size=500, seed=42) -> dict:
+    """
+    Measure recall@K of an index's neighbor lists against exact cosine neighbors.
+
+    Exact neighbors are only computed for a random sample of rows, so the
+    report stays cheap on large catalogs.
+
+    Args:
+        index (NeighborIndex): Index the neighbor lists were built with.
+        neighbors (TopKNeighbors): Neighbor lists produced by `index`.
+        sample_size (int): Number of rows to compare.
+        seed (int): Seed for the row sample.
+
+    Returns:
+        dict: Backend name, K, sample size, mean recall@K, per-row query times and the
+            index's query_summary (for LSH: fallback fraction and mean candidates) of
+            the queries that built `neighbors`.
+    """
+    # Taken before the timing queries below add to the counters
+    summary = index.query_summary()
+    rng = np.random.default_rng(seed)
+    sample = np.sort(rng.choice(index.n_items, size=min(sample_size, index.n_items), replace=False))
+    k = neighbors.k
+
+    started = time.perf_counter()
+    exact = index if isinstance(index, ExactIndex) else ExactIndex(index.vectors, dtype=index.dtype)
+    exact_indices, _ = exact.query(sample, k)
+    exact_ms = (time.perf_counter() - started) * 1000 / max(1, len(sample))
+
+    started = time.perf_counter()
+    index.query(sample, k)
+    index_ms = (time.perf_counter() - started) * 1000 / max(1, len(sample))
+
+    approx_indices = np.asarray(neighbors.indices[sample])
+    hits = [len(np.intersect1d(approx_indices[i], exact_indices[i])) for i in range(len(sample))]
+    recall = float(np.mean(hits) / k) if k else 1.0
+
+    report = {
+        "backend": index.name,
+        "k": int(k),
+        "sample_size": int(len(sample)),
+        "recall_at_k": round(recall, 4),
+        "query_ms_per_row": round(index_ms, 3),
+        "exact_query_ms_per_row": round(exact_ms, 3),
+        **summary,
+    }
+    logger.info(f"Recall@{k} of '{index.name}' vs exact on {len(sample)} rows: {recall:.4f}"
+                + (f" ({summary})" if summary else ""))
+    return report
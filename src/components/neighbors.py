@@ -0,0 +1,192 @@
+# neighbors.py
+import os
+import logging
+import multiprocessing
+from dataclasses import dataclass
+
+import numpy as np
+
+# Setup logging
+log_dir = 'logs'
+os.makedirs(log_dir, exist_ok=True)
+logger = logging.getLogger("neighbors")
+logger.setLevel(logging.DEBUG)
+console_handler = logging.StreamHandler()
+file_mode = 'w' if multiprocessing.current_process().name == 'MainProcess' else 'a'
+file_handler = logging.FileHandler(os.path.join(log_dir, 'neighbors.log'), mode=file_mode)
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+# Storage precisions of similarity scores; int8 stores round(score * INT8_SCALE)
+PRECISIONS = {
+    "float64": np.float64,
+    "float32": np.float32,
+    "float16": np.float16,
+    "int8": np.int8,
+}
+INT8_SCALE = 127
+
+
+def compute_dtype(precision="float32"):
+    """
+    Dtype vectors and similarity blocks are computed in for a storage precision.
+
+    float16 and int8 are storage formats only: CPU matrix products gain
+    nothing from them, so those scores are computed in float32 and encoded
+    when saved.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}'. Choose from {sorted(PRECISIONS)}.")
+    return np.float64 if precision == "float64" else np.float32
+
+
+def encode_scores(scores, precision="float32") -> np.ndarray:
+    """
+    Convert similarity scores to their storage precision.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}'. Choose from {sorted(PRECISIONS)}.")
+    scores = np.asarray(scores)
+    if precision == "int8":
+        return np.clip(np.rint(scores * INT8_SCALE), -INT8_SCALE, INT8_SCALE).astype(np.int8)
+    return scores.astype(PRECISIONS[precision])
+
+
+def decode_scores(scores) -> np.ndarray:
+    """
+    Stored scores as floats, whatever precision they were written in.
+    """
+    scores = np.asarray(scores)
+    if scores.dtype == np.int8:
+        return scores.astype(np.float32) / INT8_SCALE
+    return scores
+
+
+@dataclass
+class TopKNeighbors:
+    """
+    Top-K neighbor lists for every movie in the catalog.
+
+    Attributes:
+        indices (np.ndarray): int32 array of shape (N, K) with neighbor row indices, most similar first.
+        scores (np.ndarray): Array of shape (N, K) with the matching similarity scores, in the
+            precision they were computed or stored in (int8 scores are quantized; see decode_scores).
+    """
+    indices: np.ndarray
+    scores: np.ndarray
+
+    @property
+    def k(self) -> int:
+        return self.indices.shape[1]
+
+    def __len__(self) -> int:
+        return self.indices.shape[0]
+
+    def query(self, rows, top_n):
+        """
+        Neighbor indices and decoded scores of catalog rows, capped at K.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        top_n = min(top_n, self.k)
+        return self.indices[rows, :top_n], decode_scores(self.scores[rows, :top_n])
+
+
+def top_k_indices(scores, k, exclude=None):
+    """
+    Indices of the k highest scores in a single row, most similar first.
+
+    Uses np.argpartition to find the k (+1 for the excluded item) candidates
+    in O(N) and sorts only those, instead of sorting the whole row. The
+    excluded index (usually the query movie itself) is dropped from the
+    candidates rather than filtered out of all N entries.
+
+    Args:
+        scores (np.ndarray): 1-D array of similarity scores.
+        k (int): Number of indices to return.
+        exclude (int): Optional index that must not be returned.
+
+    Returns:
+        np.ndarray: Up to k indices ordered by descending score.
+    """
+    scores = np.asarray(scores).ravel()
+    n_items = scores.shape[0]
+    n_candidates = min(k + (exclude is not None), n_items)
+    if n_candidates <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    if n_candidates < n_items:
+        candidates = np.argpartition(-scores, n_candidates - 1)[:n_candidates]
+    else:
+        candidates = np.arange(n_items)
+    candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+    if exclude is not None:
+        candidates = candidates[candidates != exclude]
+    return candidates[:k]
+
+
+def select_top_k(similarity_rows, k, row_offset=0, exclude=None, dtype=np.float32):
+    """
+    Select the top-k neighbors of each row in a block of similarity scores.
+
+    The movie a row belongs to (row_offset + position in the block, or the
+    matching entry of `exclude`) is never returned as its own neighbor.
+
+    Args:
+        similarity_rows (np.ndarray): Array of shape (B, N) with similarity scores.
+        k (int): Number of neighbors to keep per row.
+        row_offset (int): Catalog index of the first row in the block.
+        exclude (np.ndarray): Optional column to exclude per row (-1 for none);
+            overrides row_offset for blocks of non-contiguous rows.
+        dtype: Float dtype the scores are ranked and returned in.
+
+    Returns:
+        tuple: (indices, scores) as int32 / `dtype` arrays of shape (B, min(k, N - 1)).
+    """
+    rows = np.array(similarity_rows, dtype=dtype, copy=True)
+    n_rows, n_items = rows.shape
+    k = max(0, min(k, n_items - 1))
+    if k == 0:
+        return np.empty((n_rows, 0), dtype=np.int32), np.empty((n_rows, 0), dtype=dtype)
+
+    # Mask out each movie's similarity with itself
+    if exclude is None:
+        exclude = np.arange(n_rows) + row_offset
+    exclude = np.asarray(exclude)
+    masked = np.flatnonzero(exclude >= 0)
+    rows[masked, exclude[masked]] = -np.inf
+
+    candidates = np.argpartition(-rows, k - 1, axis=1)[:, :k]
+    candidate_scores = np.take_along_axis(rows, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind="stable")
+
+    indices = np.take_along_axis(candidates, order, axis=1).astype(np.int32)
+    scores = np.take_along_axis(candidate_scores, order, axis=1)
+    return indices, scores
+
+
+def save_neighbors(neighbors: TopKNeighbors, path="artifacts/neighbors.npz"):
+    """
+    Save neighbor lists as an .npz archive; scores keep the precision they are stored in.
+    """
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez(path, indices=neighbors.indices, scores=neighbors.scores)
+        logger.info(f"Neighbor artifact saved to {path} (N={len(neighbors)}, K={neighbors.k}).")
+    except Exception as e:
+        logger.error(f"Failed to save neighbor artifact: {e}")
+        raise
+
+
+def load_neighbors(path="artifacts/neighbors.npz") -> TopKNeighbors:
+    """
+    Load neighbor lists written by save_neighbors.
+    """
+    try:
+        with np.load(path) as data:
+            return TopKNeighbors(indices=data["indices"], scores=data["scores"])
+    except FileNotFoundError:
+        logger.error(f"Neighbor artifact not found: {path}")
+        raise
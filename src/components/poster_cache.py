@@ -0,0 +1,125 @@
+# poster_cache.py
+import os
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+# Setup logging
+log_dir = 'logs'
+os.makedirs(log_dir, exist_ok=True)
+logger = logging.getLogger("poster_cache")
+logger.setLevel(logging.DEBUG)
+console_handler = logging.StreamHandler()
+file_handler = logging.FileHandler(os.path.join(log_dir, 'poster_cache.log'), mode='w')
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+
+class PosterCache:
+    """
+    Poster-path cache keyed by movie_id.
+
+    Lookups go to an in-process LRU first and then to a persistent SQLite
+    store; both honour the same TTL. An empty string is a valid cached value
+    (TMDB has no poster for that movie), so a miss is reported as None.
+
+    Args:
+        db_path (str): SQLite file backing the cache, or None for memory only.
+        max_entries (int): Maximum number of entries kept in the in-process LRU.
+        ttl_seconds (float): Age after which an entry is treated as a miss.
+    """
+
+    def __init__(self, db_path="artifacts/poster_cache.sqlite", max_entries=10000, ttl_seconds=7 * 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS poster_paths ("
+                "movie_id INTEGER PRIMARY KEY, poster_path TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+            logger.info(f"Poster cache opened at {db_path}.")
+
+    def _expired(self, fetched_at):
+        return time.time() - fetched_at > self.ttl_seconds
+
+    def _remember(self, movie_id, poster_path, fetched_at):
+        self._entries[movie_id] = (poster_path, fetched_at)
+        self._entries.move_to_end(movie_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, movie_id):
+        """
+        Return the cached poster path for movie_id, or None on a miss.
+        """
+        movie_id = int(movie_id)
+        with self._lock:
+            entry = self._entries.get(movie_id)
+            if entry is not None:
+                if not self._expired(entry[1]):
+                    self._entries.move_to_end(movie_id)
+                    self.hits += 1
+                    return entry[0]
+                del self._entries[movie_id]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT poster_path, fetched_at FROM poster_paths WHERE movie_id = ?", (movie_id,)
+                ).fetchone()
+                if row is not None and not self._expired(row[1]):
+                    self._remember(movie_id, row[0], row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def set(self, movie_id, poster_path):
+        """
+        Store a poster path fetched from TMDB.
+        """
+        movie_id = int(movie_id)
+        fetched_at = time.time()
+        with self._lock:
+            self._remember(movie_id, poster_path or '', fetched_at)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO poster_paths (movie_id, poster_path, fetched_at) VALUES (?, ?, ?)",
+                    (movie_id, poster_path or '', fetched_at),
+                )
+                self._conn.commit()
+
+    def stats(self) -> dict:
+        """
+        Hit/miss counters since the cache was opened.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,153 @@
+# poster_resolution.py
+import os
+import logging
+import yaml
+import pandas as pd
+from dotenv import load_dotenv
+
+from src.components.data_io import read_table, write_table
+from src.components.poster_cache import PosterCache
+from src.components.tmdb_client import TMDBClient, fetch_poster_paths
+
+# Setup logging
+log_dir = 'logs'
+os.makedirs(log_dir, exist_ok=True)
+logger = logging.getLogger("poster_resolution")
+logger.setLevel(logging.DEBUG)
+console_handler = logging.StreamHandler()
+file_handler = logging.FileHandler(os.path.join(log_dir, 'poster_resolution.log'), mode='w')
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+
+def load_config(config_path: str) -> dict:
+    """
+    Load configuration from a YAML file.
+    """
+    try:
+        with open(config_path, "r") as file:
+            return yaml.safe_load(file)
+    except FileNotFoundError:
+        logger.error(f"Config file not found: {config_path}")
+        raise
+    except yaml.YAMLError as e:
+        logger.error(f"YAML parsing error: {e}")
+        raise
+
+
+def resolve_poster_paths(movie_ids, client, store, batch_size=200, max_workers=16, batch_timeout=120.0,
+                         max_failure_rate=0.05) -> dict:
+    """
+    Resolve poster paths for every movie id, in batches.
+
+    Each resolved path is written to the persistent store as soon as it
+    arrives, so an interrupted run resumes where it stopped and a rerun only
+    calls TMDB for ids that are missing from the store or older than its TTL.
+    The run fails if the circuit breaker is still open at the end or if more
+    than `max_failure_rate` of the ids missing from the store could not be
+    resolved, instead of handing the trainer a table of empty paths.
+
+    Args:
+        movie_ids (list): TMDB movie ids to resolve.
+        client (TMDBClient): Shared TMDB client.
+        store (PosterCache): Persistent poster store used for resume and incremental refresh.
+        batch_size (int): Number of ids submitted per batch.
+        max_workers (int): Concurrent requests per batch.
+        batch_timeout (float): Cap on the wait for one batch in seconds.
+        max_failure_rate (float): Largest tolerated share of failed lookups.
+
+    Returns:
+        dict: movie_id -> poster path ('' if unresolved or TMDB has no poster).
+
+    Raises:
+        RuntimeError: If the circuit breaker is open or too many lookups failed.
+    """
+    unique_ids = list(dict.fromkeys(int(movie_id) for movie_id in movie_ids))
+    resolved = {}
+    failed = 0
+    for start in range(0, len(unique_ids), batch_size):
+        batch = unique_ids[start:start + batch_size]
+        paths = fetch_poster_paths(batch, client, cache=store, max_workers=max_workers, batch_timeout=batch_timeout)
+        for movie_id, poster_path in zip(batch, paths):
+            if poster_path is None:
+                failed += 1
+            resolved[movie_id] = poster_path or ''
+        logger.info(f"Resolved {min(start + batch_size, len(unique_ids))}/{len(unique_ids)} movies.")
+
+    stats = store.stats()
+    client_stats = client.stats()
+    rejected = client_stats["rejected_by_breaker"]
+    logger.info(f"Poster resolution done: {stats['hits']} from store, {client_stats['requests']} looked up, "
+                f"{rejected} rejected by the circuit breaker, {failed - rejected} failed or timed out.")
+
+    if client_stats["circuit"] != "closed":
+        raise RuntimeError(f"TMDB circuit breaker is {client_stats['circuit']} after the run; "
+                           f"{failed} of {stats['misses']} lookups did not resolve.")
+    failure_rate = failed / stats["misses"] if stats["misses"] else 0.0
+    if failure_rate > max_failure_rate:
+        raise RuntimeError(f"{failed} of {stats['misses']} poster lookups failed ({failure_rate:.1%}), "
+                           f"above the allowed {max_failure_rate:.1%}.")
+    return resolved
+
+
+def main():
+    """
+    Resolve poster paths for the whole catalog and save them for the trainer.
+    """
+    try:
+        load_dotenv()
+        config = load_config("config/config.yaml")
+        paths = config["paths"]
+        tmdb_config = config.get("tmdb", {})
+        resolution_config = config.get("poster_resolution", {})
+        cache_config = config.get("poster_cache", {})
+
+        api_key = os.getenv("TMDB_API_KEY")
+        if not api_key:
+            raise ValueError("TMDB_API_KEY is not set; add it to the environment or .env.")
+
+        movies = read_table(paths["transformed_data"], columns=["movie_id"])
+        logger.info(f"Resolving posters for {len(movies)} movies...")
+
+        client = TMDBClient(
+            api_key,
+            api_url=tmdb_config.get("api_url", "https://api.themoviedb.org/3"),
+            pool_size=resolution_config.get("max_workers", 16),
+            connect_timeout=tmdb_config.get("connect_timeout", 3.05),
+            read_timeout=tmdb_config.get("read_timeout", 5),
+            max_retries=tmdb_config.get("max_retries", 3),
+            backoff_factor=tmdb_config.get("backoff_factor", 0.3),
+            breaker_failures=tmdb_config.get("breaker_failures", 5),
+            breaker_reset_seconds=tmdb_config.get("breaker_reset_seconds", 30),
+        )
+        store = PosterCache(
+            db_path=cache_config.get("db_path", "artifacts/poster_cache.sqlite"),
+            ttl_seconds=resolution_config.get("refresh_after_seconds", 30 * 24 * 3600),
+        )
+
+        resolved = resolve_poster_paths(
+            movies["movie_id"].tolist(),
+            client,
+            store,
+            batch_size=resolution_config.get("batch_size", 200),
+            max_workers=resolution_config.get("max_workers", 16),
+            batch_timeout=resolution_config.get("batch_timeout", 120),
+            max_failure_rate=resolution_config.get("max_failure_rate", 0.05),
+        )
+        store.close()
+        client.close()
+
+        output = pd.DataFrame({"movie_id": list(resolved.keys()), "poster_path": list(resolved.values())})
+        write_table(output, paths["poster_paths"], export_csv=paths.get("export_csv", False))
+        logger.info(f"Poster paths saved to {paths['poster_paths']} ({(output['poster_path'] != '').sum()} with posters).")
+
+    except Exception as e:
+        logger.error(f"Poster resolution failed: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+# recommendation_service.py
+import os
+import time
+import asyncio
+import logging
+import argparse
+import threading
+from collections import deque
+
+import yaml
+import numpy as np
+from aiohttp import web
+from dotenv import load_dotenv
+
+from src.components.artifacts import load_serving_artifacts
+from src.components.poster_cache import PosterCache
+from src.components.recommender import build_title_index, lookup_title, batch_recommend
+from src.components.tmdb_client import TMDBClient, fetch_poster_paths
+
+# Setup logging
+log_dir = 'logs'
+os.makedirs(log_dir, exist_ok=True)
+logger = logging.getLogger("recommendation_service")
+logger.setLevel(logging.DEBUG)
+console_handler = logging.StreamHandler()
+file_handler = logging.FileHandler(os.path.join(log_dir, 'recommendation_service.log'), mode='w')
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+
+def load_config(config_path: str) -> dict:
+    """
+    Load configuration from a YAML file.
+    """
+    try:
+        with open(config_path, "r") as file:
+            return yaml.safe_load(file)
+    except FileNotFoundError:
+        logger.error(f"Config file not found: {config_path}")
+        raise
+    except yaml.YAMLError as e:
+        logger.error(f"YAML parsing error: {e}")
+        raise
+
+
+class RecommendationBatcher:
+    """
+    Coalesces concurrent recommendation requests into one batch_recommend call.
+
+    The first queued request waits at most `max_wait_ms` for others to join;
+    a batch is flushed early once `max_batch_size` requests are queued. The
+    gather (or, in the lazy serving mode, the similarity computation) runs in
+    a worker thread so the event loop keeps accepting requests.
+
+    Args:
+        neighbors (TopKNeighbors or LazyNeighbors): Loaded neighbor artifact.
+        max_batch_size (int): Most requests served by one call.
+        max_wait_ms (float): Longest a request waits for a batch to fill.
+    """
+
+    def __init__(self, neighbors, max_batch_size=64, max_wait_ms=2.0):
+        self.neighbors = neighbors
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.batched_requests = 0
+        self._queue = None
+        self._task = None
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def recommend(self, row, top_n):
+        """
+        Neighbor indices and scores of one catalog row, served as part of a batch.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, top_n, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            rows = np.array([row for row, _, _ in batch], dtype=np.int64)
+            top_n = max(n for _, n, _ in batch)
+            try:
+                indices, scores = await loop.run_in_executor(None, batch_recommend, rows, self.neighbors, top_n)
+            except Exception as e:
+                logger.error(f"Batch of {len(batch)} requests failed: {e}")
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.batched_requests += len(batch)
+            for position, (_, n, future) in enumerate(batch):
+                if not future.done():
+                    future.set_result((indices[position, :n], scores[position, :n]))
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "mean_batch_size": round(self.batched_requests / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+class ServiceMetrics:
+    """
+    Request counters and latency percentiles (milliseconds, over the last 1000 requests).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)
+        self.requests = 0
+        self.errors = 0
+        self.not_found = 0
+
+    def record(self, seconds, status):
+        with self._lock:
+            self.requests += 1
+            self._latencies.append(seconds)
+            if status == 404:
+                self.not_found += 1
+            elif status >= 400:
+                self.errors += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            counters = {"requests": self.requests, "errors": self.errors, "not_found": self.not_found}
+
+        def percentile(q):
+            return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 2) if latencies else 0.0
+
+        return {
+            **counters,
+            "latency_p50_ms": percentile(0.50),
+            "latency_p95_ms": percentile(0.95),
+            "latency_max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        }
+
+
+class RecommendationService:
+    """
+    HTTP API over the serving artifacts, loaded once per process.
+
+    Endpoints:
+        GET /recommend?title=&k=  Top-k recommendations for a title (JSON).
+        GET /titles               Catalog titles, in row order.
+        GET /health               Liveness and artifact summary.
+        GET /metrics              Request, batching, neighbor-cache and poster counters.
+
+    Args:
+        artifacts (ServingArtifacts): Loaded serving artifacts.
+        max_batch_size (int): Most /recommend requests answered by one batch.
+        max_wait_ms (float): Longest a request waits for its batch to fill.
+        default_k (int): Recommendations returned when k is not given.
+        tmdb_client (TMDBClient): Client used to resolve posters missing from the artifacts, or None.
+        poster_cache (PosterCache): Cache for live-resolved posters, or None.
+        tmdb_config (dict): The config's 'tmdb' section (max_workers, batch_timeout).
+    """
+
+    def __init__(self, artifacts, max_batch_size=64, max_wait_ms=2.0, default_k=5,
+                 tmdb_client=None, poster_cache=None, tmdb_config=None):
+        self.artifacts = artifacts
+        self.title_index = build_title_index(artifacts.titles)
+        self.default_k = default_k
+        self.batcher = RecommendationBatcher(artifacts.neighbors, max_batch_size, max_wait_ms)
+        self.metrics = ServiceMetrics()
+        self.tmdb_client = tmdb_client
+        self.poster_cache = poster_cache
+        self.tmdb_config = tmdb_config or {}
+        self._titles_body = None
+
+    def create_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._metrics_middleware])
+        app.router.add_get("/recommend", self.recommend)
+        app.router.add_get("/titles", self.titles)
+        app.router.add_get("/health", self.health)
+        app.router.add_get("/metrics", self.metrics_handler)
+        app.on_startup.append(self._on_startup)
+        app.on_cleanup.append(self._on_cleanup)
+        return app
+
+    async def _on_startup(self, app):
+        await self.batcher.start()
+
+    async def _on_cleanup(self, app):
+        await self.batcher.stop()
+        if self.tmdb_client is not None:
+            self.tmdb_client.close()
+        if self.poster_cache is not None:
+            self.poster_cache.close()
+
+    @web.middleware
+    async def _metrics_middleware(self, request, handler):
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await handler(request)
+            status = response.status
+            return response
+        except web.HTTPException as e:
+            status = e.status
+            raise
+        finally:
+            if request.path == "/recommend":
+                self.metrics.record(time.perf_counter() - started, status)
+
+    @staticmethod
+    def _error(status, message):
+        return web.json_response({"error": message}, status=status)
+
+    async def recommend(self, request):
+        title = request.query.get("title", "").strip()
+        if not title:
+            return self._error(400, "Query parameter 'title' is required.")
+        try:
+            k = int(request.query.get("k", self.default_k))
+        except ValueError:
+            return self._error(400, "Query parameter 'k' must be an integer.")
+        if not 1 <= k <= self.artifacts.neighbors.k:
+            return self._error(400, f"k must be between 1 and {self.artifacts.neighbors.k}.")
+
+        row = lookup_title(self.title_index, title)
+        if row is None:
+            return self._error(404, f"Title not found: {title}")
+
+        indices, scores = await self.batcher.recommend(row, k)
+        poster_paths = await self._poster_paths(indices)
+        recommendations = [
+            {
+                "rank": rank,
+                "index": int(i),
+                "title": str(self.artifacts.titles[i]),
+                "movie_id": int(self.artifacts.movie_ids[i]),
+                "score": round(float(score), 6),
+                "poster_path": poster_path,
+            }
+            for rank, (i, score, poster_path) in enumerate(zip(indices, scores, poster_paths), 1)
+        ]
+        return web.json_response({
+            "title": str(self.artifacts.titles[row]),
+            "index": int(row),
+            "k": k,
+            "recommendations": recommendations,
+        })
+
+    async def _poster_paths(self, indices) -> list:
+        """
+        Precomputed poster paths; missing ones are resolved live when a TMDB client is configured.
+
+        Entries stay None when a live lookup fails and '' when nothing could be looked up.
+        """
+        stored = self.artifacts.poster_paths
+        paths = [str(stored[i]) if stored is not None else '' for i in indices]
+        missing = [pos for pos, path in enumerate(paths) if not path]
+        if missing and self.tmdb_client is not None:
+            movie_ids = [int(self.artifacts.movie_ids[indices[pos]]) for pos in missing]
+            fetched = await asyncio.get_running_loop().run_in_executor(
+                None,
+                lambda: fetch_poster_paths(
+                    movie_ids,
+                    self.tmdb_client,
+                    cache=self.poster_cache,
+                    max_workers=self.tmdb_config.get("max_workers", 8),
+                    batch_timeout=self.tmdb_config.get("batch_timeout", 8),
+                ),
+            )
+            for pos, path in zip(missing, fetched):
+                paths[pos] = path
+        return paths
+
+    async def titles(self, request):
+        if self._titles_body is None:
+            self._titles_body = web.json_response({"titles": self.artifacts.titles.tolist()}).body
+        return web.Response(body=self._titles_body, content_type="application/json")
+
+    async def health(self, request):
+        return web.json_response({
+            "status": "ok",
+            "n_items": len(self.artifacts),
+            "k": self.artifacts.neighbors.k,
+            "mode": self.artifacts.mode,
+        })
+
+    async def metrics_handler(self, request):
+        metrics = {**self.metrics.stats(), **self.batcher.stats()}
+        if self.artifacts.mode == "lazy":
+            metrics["neighbor_rows"] = self.artifacts.neighbors.stats()
+        if self.poster_cache is not None:
+            metrics["poster_cache"] = self.poster_cache.stats()
+        if self.tmdb_client is not None:
+            metrics["tmdb"] = self.tmdb_client.stats()
+        return web.json_response(metrics)
+
+
+def build_service(config: dict, artifacts_dir="artifacts/serving") -> RecommendationService:
+    """
+    Load the serving artifacts and wire up the service from the config.
+    """
+    service_config = config.get("service", {})
+    artifacts = load_serving_artifacts(
+        artifacts_dir,
+        cache_size=config.get("serving", {}).get("lazy_cache_rows", 1024),
+    )
+
+    tmdb_client = poster_cache = None
+    tmdb_config = config.get("tmdb", {})
+    api_key = os.getenv("TMDB_API_KEY")
+    if service_config.get("resolve_posters", True) and api_key:
+        tmdb_client = TMDBClient(
+            api_key,
+            api_url=tmdb_config.get("api_url", "https://api.themoviedb.org/3"),
+            pool_size=tmdb_config.get("pool_size", 10),
+            connect_timeout=tmdb_config.get("connect_timeout", 3.05),
+            read_timeout=tmdb_config.get("read_timeout", 5),
+            max_retries=tmdb_config.get("max_retries", 3),
+            backoff_factor=tmdb_config.get("backoff_factor", 0.3),
+            breaker_failures=tmdb_config.get("breaker_failures", 5),
+            breaker_reset_seconds=tmdb_config.get("breaker_reset_seconds", 30),
+        )
+        cache_config = config.get("poster_cache", {})
+        poster_cache = PosterCache(
+            db_path=cache_config.get("db_path", "artifacts/poster_cache.sqlite"),
+            max_entries=cache_config.get("max_entries", 10000),
+            ttl_seconds=cache_config.get("ttl_seconds", 7 * 24 * 3600),
+        )
+
+    return RecommendationService(
+        artifacts,
+        max_batch_size=service_config.get("max_batch_size", 64),
+        max_wait_ms=service_config.get("max_batch_wait_ms", 2),
+        default_k=service_config.get("default_k", 5),
+        tmdb_client=tmdb_client,
+        poster_cache=poster_cache,
+        tmdb_config=tmdb_config,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve movie recommendations over HTTP.")
+    parser.add_argument("--config", default="config/config.yaml", help="Config file")
+    parser.add_argument("--artifacts", default="artifacts/serving", help="Serving artifact directory")
+    parser.add_argument("--host", help="Bind address (default: service.host)")
+    parser.add_argument("--port", type=int, help="Port (default: service.port)")
+    args = parser.parse_args()
+
+    try:
+        load_dotenv()
+        config = load_config(args.config)
+        service_config = config.get("service", {})
+        service = build_service(config, args.artifacts)
+        host = args.host or service_config.get("host", "127.0.0.1")
+        port = args.port or service_config.get("port", 8080)
+        logger.info(f"Recommendation service listening on http://{host}:{port}")
+        web.run_app(service.create_app(), host=host, port=port, print=None)
+
+    except Exception as e:
+        logger.error(f"Recommendation service failed: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    main()
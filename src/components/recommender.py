@@ -0,0 +1,100 @@
+# recommender.py
+import os
+import logging
+import multiprocessing
+
+import numpy as np
+
+from src.components.neighbors import TopKNeighbors
+
+# Setup logging
+log_dir = 'logs'
+os.makedirs(log_dir, exist_ok=True)
+logger = logging.getLogger("recommender")
+logger.setLevel(logging.DEBUG)
+console_handler = logging.StreamHandler()
+file_mode = 'w' if multiprocessing.current_process().name == 'MainProcess' else 'a'
+file_handler = logging.FileHandler(os.path.join(log_dir, 'recommender.log'), mode=file_mode)
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+
+def normalize_title(title) -> str:
+    """
+    Normalize a title for lookups (surrounding whitespace stripped, lowercased).
+    """
+    return str(title).strip().lower()
+
+
+def build_title_index(titles) -> dict:
+    """
+    Build a normalized-title -> row-index dictionary in a single pass.
+
+    Duplicate titles resolve to the first row they appear in, which is the
+    row the previous `.index[0]` lookup returned; later duplicates are only
+    reachable through their neighbors and are counted in the log.
+
+    Args:
+        titles (iterable): Movie titles in catalog row order.
+
+    Returns:
+        dict: Normalized title -> row index.
+    """
+    title_index = {}
+    duplicates = 0
+    for row, title in enumerate(titles):
+        key = normalize_title(title)
+        if key in title_index:
+            duplicates += 1
+            continue
+        title_index[key] = row
+    if duplicates:
+        logger.info(f"Title index built: {len(title_index)} titles, {duplicates} duplicate rows shadowed.")
+    return title_index
+
+
+def lookup_title(title_index: dict, title):
+    """
+    Return the row index of a title, or None if it is not in the catalog.
+    """
+    return title_index.get(normalize_title(title))
+
+
+def resolve_seed_rows(seed_titles, title_index: dict) -> np.ndarray:
+    """
+    Map many seed titles to row indices in one pass.
+
+    Returns:
+        np.ndarray: int64 row indices, -1 where the title is not in the catalog.
+    """
+    return np.fromiter(
+        (title_index.get(normalize_title(title), -1) for title in seed_titles),
+        dtype=np.int64,
+        count=len(seed_titles),
+    )
+
+
+def batch_recommend(seed_rows, neighbors: TopKNeighbors, top_n=5):
+    """
+    Recommend top N movies for many seed rows at once.
+
+    Precomputed neighbor lists are gathered with a single fancy-indexing
+    operation over the (possibly memory-mapped) artifact, so only the
+    requested rows are read; lazy neighbors compute the missing rows in blocks.
+
+    Args:
+        seed_rows (array-like): Catalog row indices of the seeds (all valid).
+        neighbors (TopKNeighbors or LazyNeighbors): Neighbor artifact.
+        top_n (int): Recommendations per seed, capped at the artifact's K.
+
+    Returns:
+        tuple: (indices, scores) arrays of shape (len(seed_rows), min(top_n, K)); scores are
+            decoded to floats whatever precision the artifact stores.
+    """
+    seed_rows = np.asarray(seed_rows, dtype=np.int64)
+    if top_n > neighbors.k:
+        logger.warning(f"Requested {top_n} recommendations but artifact only stores {neighbors.k}.")
+    return neighbors.query(seed_rows, top_n)
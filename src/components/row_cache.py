@@ -0,0 +1,168 @@
+# row_cache.py
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import multiprocessing
+
+import pandas as pd
+
+# Setup logging
+log_dir = 'logs'
+os.makedirs(log_dir, exist_ok=True)
+logger = logging.getLogger("row_cache")
+logger.setLevel(logging.DEBUG)
+console_handler = logging.StreamHandler()
+file_mode = 'w' if multiprocessing.current_process().name == 'MainProcess' else 'a'
+file_handler = logging.FileHandler(os.path.join(log_dir, 'row_cache.log'), mode=file_mode)
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+# SQLite's default limit on bound parameters per statement
+_SQL_BATCH = 900
+
+
+def hash_rows(frame: pd.DataFrame, columns, salt="") -> pd.Series:
+    """
+    Hash the given fields of every row into a short hex digest.
+
+    Args:
+        frame (pd.DataFrame): Input rows.
+        columns (list): Columns that make up a row's input.
+        salt (str): Prefix mixed into every hash (e.g. a stage code version).
+
+    Returns:
+        pd.Series: Hex digests aligned with frame.
+    """
+    joined = frame[columns[0]].astype(str)
+    for column in columns[1:]:
+        joined = joined + "\x1f" + frame[column].astype(str)
+    prefix = f"{salt}\x1e".encode("utf-8") if salt else b""
+    return pd.Series(
+        [hashlib.blake2b(prefix + text.encode("utf-8"), digest_size=8).hexdigest() for text in joined.to_numpy()],
+        index=frame.index,
+    )
+
+
+class RowCache:
+    """
+    Per-row result cache for a pipeline stage, persisted in SQLite.
+
+    A row's key hashes its input fields together with the stage's code
+    version, so rows whose inputs changed (or all rows, after the version is
+    bumped) are recomputed while the rest are read back from disk. Values are
+    strings.
+
+    Args:
+        stage (str): Stage name; stages share the database but not their keys.
+        version (str): Code version of the stage's per-row logic.
+        db_path (str): SQLite database file.
+        prune_after_days (float): Entries of this stage not used for this long are deleted on close.
+    """
+
+    def __init__(self, stage, version, db_path="artifacts/row_cache.sqlite", prune_after_days=30):
+        self.stage = stage
+        self.version = str(version)
+        self.db_path = db_path
+        self.prune_after_days = prune_after_days
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS row_cache ("
+            "stage TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, used_at REAL NOT NULL, "
+            "PRIMARY KEY (stage, key)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys) -> dict:
+        """
+        Look up many keys at once and mark the found entries as used.
+        """
+        found = {}
+        keys = list(keys)
+        for start in range(0, len(keys), _SQL_BATCH):
+            batch = keys[start:start + _SQL_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT key, value FROM row_cache WHERE stage = ? AND key IN ({placeholders})",
+                [self.stage, *batch],
+            ).fetchall()
+            found.update(rows)
+        if found:
+            now = time.time()
+            self._conn.executemany(
+                "UPDATE row_cache SET used_at = ? WHERE stage = ? AND key = ?",
+                [(now, self.stage, key) for key in found],
+            )
+            self._conn.commit()
+        return found
+
+    def put_many(self, items: dict):
+        """
+        Store key -> value pairs.
+        """
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO row_cache (stage, key, value, used_at) VALUES (?, ?, ?, ?)",
+            [(self.stage, key, str(value), now) for key, value in items.items()],
+        )
+        self._conn.commit()
+
+    def apply(self, frame: pd.DataFrame, columns, compute) -> pd.Series:
+        """
+        Compute a per-row string result, reusing cached values for unchanged rows.
+
+        Args:
+            frame (pd.DataFrame): Input rows.
+            columns (list): Columns the result depends on.
+            compute (callable): Maps a sub-frame of cache misses to a Series of results with the same index.
+
+        Returns:
+            pd.Series: One result per row of frame, in frame order.
+        """
+        keys = hash_rows(frame, columns, salt=self.version)
+        found = self.get_many(keys.unique())
+        missing = ~keys.isin(found.keys())
+
+        results = keys.map(found).astype(object)
+        if missing.any():
+            computed = compute(frame[missing]).to_numpy()
+            results[missing] = computed
+            self.put_many(dict(zip(keys[missing], computed)))
+
+        hits, misses = int((~missing).sum()), int(missing.sum())
+        self.hits += hits
+        self.misses += misses
+        logger.info(f"[{self.stage}] Row cache: {hits} hits, {misses} misses "
+                    f"({hits / max(1, hits + misses):.2%} hit rate).")
+        return results
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "stage": self.stage,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        """
+        Delete this stage's entries unused for prune_after_days, then close the database.
+        """
+        if self.prune_after_days:
+            cutoff = time.time() - self.prune_after_days * 86400
+            pruned = self._conn.execute(
+                "DELETE FROM row_cache WHERE stage = ? AND used_at < ?", (self.stage, cutoff)
+            ).rowcount
+            self._conn.commit()
+            if pruned:
+                logger.info(f"[{self.stage}] Pruned {pruned} stale row cache entries.")
+        self._conn.close()
@@ -0,0 +1,259 @@
+# tmdb_client.py
+import os
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeoutError
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Setup logging
+log_dir = 'logs'
+os.makedirs(log_dir, exist_ok=True)
+logger = logging.getLogger("tmdb_client")
+logger.setLevel(logging.DEBUG)
+console_handler = logging.StreamHandler()
+file_handler = logging.FileHandler(os.path.join(log_dir, 'tmdb_client.log'), mode='w')
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+TMDB_API_URL = "https://api.themoviedb.org/3"
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when the circuit breaker is open and TMDB is not being called."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    are rejected for `reset_seconds`; after that a single call is let through
+    as a trial (concurrent callers keep being rejected) and closes the circuit
+    again if it succeeds, or reopens it if it fails.
+    """
+
+    def __init__(self, failure_threshold=5, reset_seconds=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial_running or time.monotonic() - self._opened_at < self.reset_seconds:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning(f"Circuit opened after {self._failures} consecutive TMDB failures.")
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class TMDBClient:
+    """
+    Shared, connection-pooled TMDB client.
+
+    Keeps one requests.Session with keep-alive connections, retries 429/5xx
+    responses with exponential backoff, stops calling TMDB while the circuit
+    breaker is open and records per-request latency.
+
+    Args:
+        api_key (str): TMDB API key.
+        api_url (str): Base URL of the TMDB API (overridable for local stubs).
+        pool_size (int): Maximum number of pooled connections.
+        connect_timeout (float): Connect timeout in seconds.
+        read_timeout (float): Read timeout in seconds.
+        max_retries (int): Retries on 429/5xx and connection errors.
+        backoff_factor (float): Exponential backoff factor between retries.
+        breaker_failures (int): Consecutive failures that open the circuit.
+        breaker_reset_seconds (float): How long the circuit stays open.
+    """
+
+    def __init__(self, api_key, api_url=TMDB_API_URL, pool_size=10, connect_timeout=3.05, read_timeout=5.0,
+                 max_retries=3, backoff_factor=0.3, breaker_failures=5, breaker_reset_seconds=30.0):
+        self.api_key = api_key
+        self.api_url = api_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = CircuitBreaker(breaker_failures, breaker_reset_seconds)
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(["GET"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._latencies = deque(maxlen=1000)
+        self._requests = 0
+        self._errors = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def get_poster_path(self, movie_id) -> str:
+        """
+        Fetch the poster path of a single movie.
+
+        A 404 means TMDB does not know the movie: it yields '' and is not counted
+        against the breaker. Every other error status (401/403 for a bad API key
+        included) raises and counts as a failure.
+
+        Returns:
+            str: Poster path, or '' if TMDB has no poster for the movie.
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open.
+            requests.RequestException: On network or HTTP errors after retries.
+        """
+        if not self.breaker.allow():
+            with self._lock:
+                self._rejected += 1
+            raise CircuitOpenError("TMDB circuit breaker is open")
+
+        started = time.perf_counter()
+        try:
+            response = self.session.get(
+                f"{self.api_url}/movie/{movie_id}",
+                params={"api_key": self.api_key, "language": "en-US"},
+                timeout=self.timeout,
+            )
+            if response.status_code == 404:
+                logger.debug(f"TMDB returned 404 for movie ID {movie_id}; no poster.")
+                poster_path = ''
+            else:
+                response.raise_for_status()
+                poster_path = response.json().get("poster_path") or ''
+        except Exception:
+            self._record(time.perf_counter() - started, failed=True)
+            self.breaker.record_failure()
+            raise
+        self._record(time.perf_counter() - started, failed=False)
+        self.breaker.record_success()
+        return poster_path
+
+    def _record(self, latency, failed):
+        with self._lock:
+            self._requests += 1
+            self._errors += int(failed)
+            self._latencies.append(latency)
+
+    def stats(self) -> dict:
+        """
+        Request, error and latency counters (latencies in milliseconds, over the last 1000 requests).
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            requests_made, errors, rejected = self._requests, self._errors, self._rejected
+
+        def percentile(q):
+            return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 1) if latencies else 0.0
+
+        return {
+            "requests": requests_made,
+            "errors": errors,
+            "rejected_by_breaker": rejected,
+            "circuit": self.breaker.state,
+            "latency_p50_ms": percentile(0.50),
+            "latency_p95_ms": percentile(0.95),
+            "latency_max_ms": round(latencies[-1] * 1000, 1) if latencies else 0.0,
+        }
+
+    def close(self):
+        self.session.close()
+
+
+def fetch_poster_paths(movie_ids, client: TMDBClient, cache=None, max_workers=8, batch_timeout=8.0) -> list:
+    """
+    Fetch poster paths for a whole recommendation batch concurrently.
+
+    Cached ids are answered without a network call; the remaining ids are
+    fetched on a bounded thread pool through the shared client, and each
+    result is written to the cache as soon as its lookup completes. Lookups
+    still running after batch_timeout seconds are abandoned.
+
+    Args:
+        movie_ids (list): TMDB movie ids in rank order.
+        client (TMDBClient): Shared TMDB client.
+        cache (PosterCache): Optional poster cache read before fetching and filled per completed lookup.
+        max_workers (int): Maximum number of concurrent requests.
+        batch_timeout (float): Cap on the total wait for the batch in seconds.
+
+    Returns:
+        list: Poster paths in the same order as movie_ids; None where the lookup failed or timed out.
+    """
+    results = [None] * len(movie_ids)
+    pending = {}
+    for position, movie_id in enumerate(movie_ids):
+        cached = cache.get(movie_id) if cache is not None else None
+        if cached is not None:
+            results[position] = cached
+        else:
+            pending.setdefault(movie_id, []).append(position)
+
+    if not pending:
+        return results
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending))))
+    futures = {executor.submit(client.get_poster_path, movie_id): movie_id for movie_id in pending}
+    finished = set()
+    try:
+        for future in as_completed(futures, timeout=batch_timeout):
+            finished.add(future)
+            movie_id = futures[future]
+            try:
+                poster_path = future.result()
+            except Exception as e:
+                logger.warning(f"Could not fetch poster for movie ID {movie_id}: {e}")
+                continue
+            if cache is not None:
+                cache.set(movie_id, poster_path)
+            for position in pending[movie_id]:
+                results[position] = poster_path
+    except FutureTimeoutError:
+        pass
+
+    for future in (future for future in futures if future not in finished):
+        # Drop lookups that have not started yet; running ones finish in the background
+        future.cancel()
+        logger.warning(f"Poster lookup for movie ID {futures[future]} exceeded the {batch_timeout}s batch timeout.")
+    executor.shutdown(wait=False)
+    return results